@@ -0,0 +1,228 @@
+"""Approximate top-k neighbour index over reviewer vectors.
+
+Ratings are positive, so two reviewers have a non-zero cosine similarity
+exactly when they reviewed someone in common. Reviewers are therefore hashed
+with MinHash over the set of employees they reviewed: in each table a
+reviewer's code is the first of their reviewees under a random order, and two
+reviewers collide with probability equal to the Jaccard overlap of their
+sets, which suits vectors this sparse far better than random hyperplanes
+do. Reviewers that share a bucket in any table become candidate
+neighbours and are re-ranked by their exact cosine similarity. The 'topk'
+weighting mode weights a review by the reviewer's k best neighbours only,
+instead of the reviewer's whole similarity row; it uses the exact sparse
+search unless the 'lsh' backend is asked for.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from cancellation import check_cancelled
+from sparse_similarity import build_sparse_user_item_matrix, normalize_rows, pairwise_similarity
+
+# Hash tables; a neighbour sharing one of five reviewees (Jaccard 1/9) is
+# missed by all of them with probability (8/9) ** 24, about 6%
+DEFAULT_TABLES = 24
+# Neighbouring slots compared within a sorted bucket, bounds candidate pairs per table
+DEFAULT_WINDOW = 16
+# Rows multiplied at a time by the exact top-k search
+EXACT_ROW_BLOCK = 4096
+
+
+def _top_k_from_pairs(n, rows, cols, sims, k):
+    # Best k (col, sim) entries per row; rows with fewer are padded with -1 / 0.0
+    neighbours = np.full((n, k), -1, dtype=np.int64)
+    similarities = np.zeros((n, k))
+    keep = sims > 0
+    rows, cols, sims = rows[keep], cols[keep], sims[keep]
+    order = np.lexsort((cols, -sims, rows))
+    rows, cols, sims = rows[order], cols[order], sims[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    top = rank < k
+    neighbours[rows[top], rank[top]] = cols[top]
+    similarities[rows[top], rank[top]] = sims[top]
+    return neighbours, similarities
+
+
+class MinHashIndex:
+    """Multi-table MinHash LSH over the set of employees each reviewer rated.
+
+    Each table's code combines ``band_rows`` MinHashes; more rows make
+    buckets stricter (collision probability J ** band_rows) and call for
+    more tables.
+    """
+
+    def __init__(self, unit, n_tables=DEFAULT_TABLES, band_rows=1, window=DEFAULT_WINDOW, seed=0):
+        start = time.perf_counter()
+        n_columns = unit.shape[1]
+        if band_rows < 1 or float(max(n_columns, 2)) ** band_rows >= 2 ** 62:
+            raise ValueError("band_rows must be at least 1 and small enough for a 62-bit code")
+        self.unit = unit
+        self.window = window
+        # Reviewers who reviewed nobody have no set and are never neighbours
+        self.active = np.flatnonzero(np.diff(unit.indptr))
+        self.n_tables = n_tables
+        self.band_rows = band_rows
+
+        rng = np.random.default_rng(seed)
+        # Empty rows sit between active ones without entries, so the active
+        # rows' starts split unit.indices into exactly their reviewee lists
+        starts = unit.indptr[self.active]
+        self.codes = np.zeros((n_tables, len(self.active)), dtype=np.int64)
+        self.tiebreak = np.empty((n_tables, len(self.active)), dtype=np.int64)
+        for t in range(n_tables):
+            for _ in range(band_rows):
+                rank = rng.permutation(n_columns)
+                first = np.minimum.reduceat(rank[unit.indices], starts) if len(starts) else starts
+                self.codes[t] = self.codes[t] * n_columns + first
+            self.tiebreak[t] = rng.permutation(len(self.active))
+        self.build_seconds = time.perf_counter() - start
+        self.query_seconds = 0.0
+
+    def candidate_pairs(self, cancel=None):
+        """Unique (a, b) reviewer pairs, a < b, that collide in some table."""
+        import scipy.sparse as sp
+        n = self.unit.shape[0]
+        first, second = [], []
+        for codes, tiebreak in zip(self.codes, self.tiebreak):
+            check_cancelled(cancel)
+            # tiebreak is a permutation: a stable sort of the shuffled codes
+            # leaves each bucket in random order, so the window samples it fairly
+            order = tiebreak[np.argsort(codes[tiebreak], kind="stable")]
+            sorted_codes = codes[order]
+            for offset in range(1, self.window + 1):
+                same = sorted_codes[:-offset] == sorted_codes[offset:]
+                if not same.any():
+                    break
+                a = self.active[order[:-offset][same]]
+                b = self.active[order[offset:][same]]
+                first.append(np.minimum(a, b))
+                second.append(np.maximum(a, b))
+        if not first:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        check_cancelled(cancel)
+        # Pairs that collide in several tables are merged by the CSR
+        # conversion, which is linear where np.unique would sort every key
+        a, b = np.concatenate(first), np.concatenate(second)
+        pairs = sp.csr_matrix((np.ones(len(a), dtype=np.int32), (a, b)), shape=(n, n))
+        pairs.sum_duplicates()
+        pairs = pairs.tocoo()
+        return pairs.row.astype(np.int64), pairs.col.astype(np.int64)
+
+    def query(self, k, cancel=None):
+        """Approximate top-k neighbours of every reviewer as (indices, similarities)."""
+        start = time.perf_counter()
+        a, b = self.candidate_pairs(cancel)
+        check_cancelled(cancel)
+        sims = pairwise_similarity(self.unit, a, b, cancel=cancel)
+        result = _top_k_from_pairs(self.unit.shape[0], np.concatenate([a, b]),
+                                   np.concatenate([b, a]), np.concatenate([sims, sims]), k)
+        self.query_seconds = time.perf_counter() - start
+        return result
+
+
+def exact_top_k(unit, k, cancel=None):
+    """Exact top-k neighbours from the sparse product U U^T, one row block at a time."""
+    n = unit.shape[0]
+    neighbours = np.full((n, k), -1, dtype=np.int64)
+    similarities = np.zeros((n, k))
+    transposed = unit.T.tocsr()
+    for start in range(0, n, EXACT_ROW_BLOCK):
+        check_cancelled(cancel)
+        block = (unit[start:start + EXACT_ROW_BLOCK] @ transposed).tocoo()
+        off_diagonal = block.row + start != block.col
+        idx, sims = _top_k_from_pairs(block.shape[0], block.row[off_diagonal].astype(np.int64),
+                                      block.col[off_diagonal].astype(np.int64),
+                                      block.data[off_diagonal], k)
+        neighbours[start:start + block.shape[0]] = idx
+        similarities[start:start + block.shape[0]] = sims
+    return neighbours, similarities
+
+
+def weights_from_neighbours(neighbours, similarities, reviews, k):
+    # Mean similarity over the reviewer's k best neighbours, skipping the
+    # reviewee just as the full weighting leaves out the reviewee's column
+    rv, re = reviews.reviewer_idx, reviews.reviewee_idx
+    usable = neighbours[rv] != re[:, None]
+    usable &= np.cumsum(usable, axis=1) <= k
+    return (similarities[rv] * usable).sum(axis=1) / k
+
+
+def top_k_review_weights(n, reviews, k, approximate=True, cancel=None, **index_options):
+    unit = normalize_rows(build_sparse_user_item_matrix(n, reviews))
+    check_cancelled(cancel)
+    if approximate:
+        neighbours, similarities = MinHashIndex(unit, **index_options).query(k + 1, cancel)
+    else:
+        neighbours, similarities = exact_top_k(unit, k + 1, cancel)
+    check_cancelled(cancel)
+    return weights_from_neighbours(neighbours, similarities, reviews, k)
+
+
+def evaluate_top_k(engine, k=10, **index_options):
+    """Build/query time and error of the LSH top-k mode against the exact paths."""
+    n = len(engine.employees)
+    reviews = engine.reviews
+    unit = normalize_rows(build_sparse_user_item_matrix(n, reviews))
+
+    index = MinHashIndex(unit, **index_options)
+    approx_idx, approx_sim = index.query(k + 1)
+    start = time.perf_counter()
+    exact_idx, exact_sim = exact_top_k(unit, k + 1)
+    exact_seconds = time.perf_counter() - start
+
+    # Recall of the true top-k neighbours (with positive similarity)
+    approx_set = approx_idx[:, :k]
+    exact_set = exact_idx[:, :k]
+    found = (exact_set[:, :, None] == approx_set[:, None, :]).any(axis=2) & (exact_set >= 0)
+    relevant = int((exact_set >= 0).sum())
+    recall = found.sum() / relevant if relevant else 1.0
+
+    approx = engine.score_with_weights(weights_from_neighbours(approx_idx, approx_sim, reviews, k))
+    exact = engine.score_with_weights(weights_from_neighbours(exact_idx, exact_sim, reviews, k))
+    full = engine.score('cosine')
+    scored = approx.order
+    return {
+        'k': k,
+        'n_tables': index.n_tables,
+        'band_rows': index.band_rows,
+        'build_seconds': index.build_seconds,
+        'query_seconds': index.query_seconds,
+        'exact_top_k_seconds': exact_seconds,
+        'recall': float(recall),
+        'weight_mae_vs_exact_top_k': float(np.mean(np.abs(approx.review_weight - exact.review_weight))) if len(reviews) else 0.0,
+        'final_score_mae_vs_exact_top_k': float(np.mean(np.abs(approx.final_score[scored] - exact.final_score[scored]))) if len(scored) else 0.0,
+        'final_score_mae_vs_cosine': float(np.mean(np.abs(approx.final_score[scored] - full.final_score[scored]))) if len(scored) else 0.0,
+        'verdict_agreement_vs_cosine': float(np.mean(approx.approved[scored] == full.approved[scored])) if len(scored) else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the approximate top-k weighting on a random org")
+    parser.add_argument("--employees", type=int, default=20000)
+    parser.add_argument("--reviews-per-employee", type=int, default=5)
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--tables", type=int, default=DEFAULT_TABLES)
+    parser.add_argument("--rows", type=int, default=1, help="MinHashes per table code")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from scoring_engine import ReviewArrays, ScoringEngine
+
+    rng = np.random.default_rng(args.seed)
+    n, m = args.employees, args.employees * args.reviews_per_employee
+    reviewer = rng.integers(0, n, m)
+    reviewee = (reviewer + rng.integers(1, n, m)) % n
+    reviews = ReviewArrays(reviewer, reviewee, rng.integers(1, 6, (m, 8)))
+    engine = ScoringEngine([f"EMP{i + 1:03d}" for i in range(n)], [f"C{c}" for c in range(8)],
+                           rng.integers(1, 6, (n, 8)), reviews)
+    for k in args.k:
+        report = evaluate_top_k(engine, k, n_tables=args.tables, band_rows=args.rows,
+                                window=args.window, seed=args.seed)
+        print(" ".join(f"{key}={value:.4g}" if isinstance(value, float) else f"{key}={value}"
+                       for key, value in report.items()))
+
+
+if __name__ == "__main__":
+    main()
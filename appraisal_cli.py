@@ -0,0 +1,200 @@
+"""Headless batch appraisal: load a cycle, score it and stream a report.
+
+Runs the same scoring as the GUI's "Generate Results" without importing
+tkinter, and writes one row per employee as CSV, JSON Lines or HTML. Rows
+are produced by a generator and written as they come, so memory does not
+grow with the size of the report.
+
+    python appraisal_cli.py --store appraisal_cycle.db --format csv -o results.csv
+    python appraisal_cli.py --objective objective.csv --reviews reviews.parquet --format jsonl
+    python appraisal_cli.py --synthetic 100000 --format html -o report.html
+    python appraisal_cli.py --synthetic 100000 --weighting category --sweep sweep.csv -o results.csv
+"""
+import argparse
+import csv
+import html
+import json
+import sys
+
+import numpy as np
+
+from appraisal_core import AppraisalCore
+from ingest import generate_synthetic_org, load_org
+from instrumentation import metrics
+from review_store import ReviewStore
+from scoring_engine import APPROVAL_THRESHOLD, DEFAULT_NEIGHBOURS, approval_counts, sweep_verdicts
+
+FIELDS = ['employee_id', 'name', 'objective_mean', 'weighted_peer_avg', 'final_score',
+          'reviews', 'status', 'verdict']
+# Grid for --sweep: objective weight 0.50-0.90 (the peer weight is the rest)
+# and approval thresholds 0.50-0.90, both in steps of 0.05
+SWEEP_OBJECTIVE_WEIGHTS = np.round(np.arange(0.5, 0.901, 0.05), 2)
+SWEEP_THRESHOLDS = np.round(np.arange(0.5, 0.901, 0.05), 2)
+
+
+def iter_result_rows(core, result, details=False):
+    """Yield one report row per scored employee, in the GUI's order."""
+    employees = result.engine.employees
+    for i in result.order:
+        row = {
+            'employee_id': core.employee_ids[i],
+            'name': employees[i],
+            'objective_mean': float(result.objective_mean[i]),
+            'weighted_peer_avg': float(result.weighted_peer_avg[i]),
+            'final_score': float(result.final_score[i]),
+            'reviews': int(result.review_count[i]),
+            'status': result.status(i),
+            'verdict': result.verdict(i)
+        }
+        if details:
+            reviews = result.engine.reviews
+            row['reviewer_details'] = [
+                {
+                    'reviewer_id': core.employee_ids[reviews.reviewer_idx[pos]],
+                    'similarity': float(result.review_weight[pos]),
+                    'avg_rating': float(result.review_avg[pos]),
+                    'ratings': dict(zip(core.categories, reviews.ratings[pos].tolist()))
+                }
+                for pos in result.reviews_of(i)
+            ]
+        yield row
+
+
+def write_csv(rows, out):
+    writer = csv.DictWriter(out, fieldnames=FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+
+
+def write_jsonl(rows, out):
+    for row in rows:
+        out.write(json.dumps(row) + "\n")
+
+
+def write_html(rows, out):
+    out.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+              "<title>Final Appraisal Breakdown</title></head><body>\n")
+    out.write(f"<h1>Final Appraisal Breakdown</h1>\n<p>Threshold: {APPROVAL_THRESHOLD:.2f}</p>\n")
+    out.write("<table>\n<tr>" + "".join(f"<th>{field}</th>" for field in FIELDS) + "</tr>\n")
+    for row in rows:
+        cells = []
+        for field in FIELDS:
+            value = row[field]
+            cells.append(f"<td>{value:.2f}</td>" if isinstance(value, float)
+                         else f"<td>{html.escape(str(value))}</td>")
+        out.write("<tr>" + "".join(cells) + "</tr>\n")
+    out.write("</table>\n</body></html>\n")
+
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl, 'html': write_html}
+
+
+def write_sweep(result, path):
+    """Approval counts for every weight split and threshold in the --sweep grid, as CSV."""
+    weights = np.stack([SWEEP_OBJECTIVE_WEIGHTS, np.round(1 - SWEEP_OBJECTIVE_WEIGHTS, 2)], axis=1)
+    # No thresholds here: counting from sorted scores avoids the full verdict array
+    final, _ = sweep_verdicts(result, weights, [])
+    counts = approval_counts(final, SWEEP_THRESHOLDS)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(['objective_weight', 'peer_weight', 'threshold', 'approved', 'approval_rate'])
+        for (objective_weight, peer_weight), row in zip(weights, counts):
+            for threshold, approved in zip(SWEEP_THRESHOLDS, row):
+                writer.writerow([objective_weight, peer_weight, threshold, int(approved),
+                                 f"{approved / max(len(result), 1):.4f}"])
+
+
+def load_core(args):
+    core = AppraisalCore()
+    if args.store:
+        store = ReviewStore(args.store)
+        if store.is_empty():
+            raise SystemExit(f"{args.store} holds no appraisal cycle")
+        cycle = store.load()
+        store.close()
+    elif args.objective:
+        cycle = load_org(args.objective, args.reviews, core.categories)
+    else:
+        cycle = generate_synthetic_org(args.synthetic, core.categories,
+                                       reviews_per_employee=args.reviews_per_employee, seed=args.seed,
+                                       departments=args.departments)
+    core.apply_cycle(cycle)
+    return core
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an appraisal batch without a display")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--store", help="SQLite appraisal cycle saved by the GUI")
+    source.add_argument("--objective", help="CSV/Parquet of objective scores")
+    source.add_argument("--synthetic", type=int, metavar="N", help="generate a random org of N employees")
+    parser.add_argument("--reviews", help="CSV/Parquet of peer reviews (with --objective)")
+    parser.add_argument("--reviews-per-employee", type=int, default=5)
+    parser.add_argument("--departments", type=int, default=None,
+                        help="with --synthetic, split the org into departments that review internally")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--weighting", choices=['cosine', 'topk', 'uniform', 'category'], default=None,
+                        help="peer weighting (default: cosine)")
+    parser.add_argument("--bias", choices=['none', 'center', 'zscore'], default=None,
+                        help="reviewer-bias correction for --weighting category (default: zscore)")
+    parser.add_argument("--k", type=int, default=None,
+                        help=f"neighbours kept per reviewer for --weighting topk (default: {DEFAULT_NEIGHBOURS})")
+    parser.add_argument("--neighbours", choices=['exact', 'lsh'], default=None,
+                        help="neighbour search for --weighting topk: exact, or approximate MinHash LSH "
+                             "(faster on large orgs, ~0.94 recall; default: exact)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="compute cosine similarities over ranges of reviews in this many processes")
+    parser.add_argument("--format", choices=sorted(WRITERS), default='csv')
+    parser.add_argument("--details", action="store_true", help="include per-reviewer details (jsonl only)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--metrics", help="write stage timings and counters (.json, or .prom for Prometheus)")
+    parser.add_argument("--profile", help="write a cProfile dump of the scoring run")
+    parser.add_argument("--history", help="also record the cycle and its scores in this history directory")
+    parser.add_argument("--cycle", help="cycle id to record under, e.g. 2025Q3 (with --history)")
+    parser.add_argument("--sweep", help="also write approval counts over a grid of weights and thresholds (CSV)")
+    args = parser.parse_args(argv)
+    if args.reviews and not args.objective:
+        parser.error("--reviews requires --objective")
+    if bool(args.history) != bool(args.cycle):
+        parser.error("--history and --cycle go together")
+    if args.bias and args.weighting != 'category':
+        parser.error("--bias requires --weighting category")
+    if (args.k is not None or args.neighbours) and args.weighting != 'topk':
+        parser.error("--k and --neighbours require --weighting topk")
+    if args.k is not None and args.k < 1:
+        parser.error("--k must be at least 1")
+    if args.workers and args.workers > 1 and args.weighting not in (None, 'cosine', 'uniform'):
+        parser.error(f"--workers supports cosine and uniform weighting, not {args.weighting}")
+
+    metrics.enabled = metrics.enabled or bool(args.metrics)
+    metrics.profile = bool(args.profile)
+    with metrics.span("cli.load"):
+        core = load_core(args)
+    backend = (args.neighbours if args.weighting == 'topk' else args.bias) or 'auto'
+    compute = core.prepare_analysis(args.weighting, workers=args.workers, backend=backend,
+                                    k=args.k or DEFAULT_NEIGHBOURS)
+    result = metrics.profiled(compute) if compute else None
+    rows = iter_result_rows(core, result, details=args.details) if result is not None else iter(())
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        with metrics.span("cli.write"):
+            WRITERS[args.format](rows, out)
+    finally:
+        if args.output:
+            out.close()
+    if args.history and result is not None:
+        from history_store import HistoryStore
+        with metrics.span("cli.history"):
+            HistoryStore(args.history).record_cycle(args.cycle, core, result)
+    if args.sweep and result is not None:
+        write_sweep(result, args.sweep)
+    if args.metrics:
+        metrics.export(args.metrics)
+    if args.profile and result is not None:
+        metrics.dump_profile(args.profile)
+
+
+if __name__ == "__main__":
+    main()
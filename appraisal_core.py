@@ -0,0 +1,206 @@
+"""Appraisal state and scoring, with no tkinter dependency.
+
+EmployeeAppraisalSystem builds the GUI on top of AppraisalCore, and the batch
+CLI uses it directly on servers without a display.
+"""
+import importlib
+import importlib.util
+
+import numpy as np
+from instrumentation import metrics
+from org_model import ReviewLog
+from scoring_engine import DEFAULT_NEIGHBOURS, ScoringEngine, sklearn_available
+
+# Imported on first use rather than at startup; warm_up loads them early.
+# scipy.sparse backs the default cosine path, pandas the CSV import and the
+# legacy reference methods below
+WARM_UP_MODULES = ['scipy.sparse', 'pandas']
+
+CATEGORIES = [
+    'Productivity', 'Teamwork', 'Innovation', 'Communication',
+    'Leadership', 'Problem Solving', 'Adaptability', 'Quality of Work'
+]
+
+def warm_up(modules=WARM_UP_MODULES):
+    """Import the analysis libraries ahead of the first run; call off the UI thread."""
+    for name in modules:
+        if importlib.util.find_spec(name.split('.')[0]) is not None:
+            importlib.import_module(name)
+
+
+class AppraisalCore:
+    # Employees are dense ids: employees[i] is the display name and
+    # employee_ids[i] the EMP code of employee i. Names may repeat, codes may not
+    def __init__(self):
+        self.categories = list(CATEGORIES)
+        self.employees = []
+        self.employee_ids = []
+        self.code_index = {}
+        self.objective = np.zeros((0, len(self.categories)), dtype=np.uint8)
+        self.review_log = ReviewLog(len(self.categories))
+        self.incremental_scorer = None
+    
+    def apply_cycle(self, cycle):
+        self.categories = list(cycle.categories)
+        self.employees = list(cycle.names)
+        self.employee_ids = list(cycle.codes)
+        self.code_index = {code: i for i, code in enumerate(self.employee_ids)}
+        self.objective = np.asarray(cycle.objective, dtype=np.uint8)
+        self.review_log = ReviewLog.from_arrays(cycle.reviews)
+    
+    def employee_labels(self):
+        return [f"{code} - {name}" for code, name in zip(self.employee_ids, self.employees)]
+    
+    def record_review(self, reviewer, reviewee, ratings):
+        # ratings are in category order
+        self.review_log.append(reviewer, reviewee, ratings)
+        if self.incremental_scorer is not None:
+            self.incremental_scorer.add_review(reviewer, reviewee, ratings)
+    
+    def has_reviews(self):
+        return len(self.review_log) > 0
+    
+    def scoring_engine(self):
+        return ScoringEngine.from_app(self)
+    
+    def current_weighting(self):
+        return 'cosine'
+    
+    def analyze_reviews(self, weighting=None):
+        compute = self.prepare_analysis(weighting)
+        return compute().to_dict() if compute else {}
+    
+    def prepare_analysis(self, weighting=None, workers=None, backend='auto', k=DEFAULT_NEIGHBOURS, cancel=None):
+        # Snapshot everything the analysis reads and return a callable that is
+        # safe to run on a worker while reviews keep coming in. Cosine weights
+        # are kept up to date by the incremental scorer when there is one;
+        # workers > 1 spreads the similarity work over a process pool; backend and
+        # k are passed to ScoringEngine.score; setting ``cancel`` stops the returned
+        # callable with AnalysisCancelled. analyze_with_sklearn and
+        # analyze_without_sklearn are kept as the reference implementations
+        if not self.has_reviews():
+            return None
+        if weighting is None:
+            weighting = self.current_weighting()
+        
+        if weighting == 'cosine' and self.incremental_scorer is not None:
+            with metrics.span("analysis.incremental"):
+                result = self.incremental_scorer.result()
+            metrics.count("employees_scored", len(result))
+            return lambda: result
+        with metrics.span("analysis.prepare"):
+            engine = self.scoring_engine()
+        if workers and workers > 1:
+            # Imported here so startup does not load multiprocessing
+            from sharded_scoring import score_sharded
+            return lambda: score_sharded(engine, weighting, workers, cancel=cancel)
+        return lambda: engine.score(weighting, backend, k, cancel=cancel)
+    
+    def analyze_with_sklearn(self):
+        import pandas as pd
+        from sklearn.metrics.pairwise import cosine_similarity
+        matrix = self.build_user_item_matrix()
+        cosine_sim = cosine_similarity(matrix)
+        sim_df = pd.DataFrame(cosine_sim)
+        
+        final_scores = {}
+        for emp in self.reviewed_employees():
+            final_scores[emp] = self.calculate_employee_score(emp, sim_df)
+        
+        return final_scores
+    
+    def analyze_by_category(self, bias='zscore'):
+        # Category-aware similarity on bias-corrected ratings; see category_cf
+        if not self.has_reviews():
+            return {}
+        return self.scoring_engine().score('category', bias).to_dict()
+    
+    def analyze_without_sklearn(self):
+        final_scores = {}
+        for emp in self.reviewed_employees():
+            final_scores[emp] = self.simple_calculate_employee_score(emp)
+        
+        return final_scores
+    
+    def reviewed_employees(self):
+        # Employee ids in the order their first review was recorded
+        reviewee = self.review_log.reviewee[:len(self.review_log)]
+        _, first = np.unique(reviewee, return_index=True)
+        return reviewee[np.sort(first)].tolist()
+    
+    def peer_reviews(self, emp):
+        return [(int(self.review_log.reviewer[pos]),
+                 dict(zip(self.categories, self.review_log.ratings[pos].tolist())))
+                for pos in self.review_log.reviews_of(emp)]
+    
+    def build_user_item_matrix(self):
+        import pandas as pd
+        n = len(self.employees)
+        matrix = pd.DataFrame(index=range(n), columns=range(n), dtype=float)
+        for emp in self.reviewed_employees():
+            for reviewer, rating in self.peer_reviews(emp):
+                avg_score = np.mean(list(rating.values()))
+                matrix.loc[reviewer, emp] = avg_score
+        return matrix.fillna(0)
+    
+    def calculate_employee_score(self, emp, sim_df):
+        import pandas as pd
+        obj_scores = pd.Series(self.objective[emp].astype(int), index=self.categories)
+        obj_mean = obj_scores.mean()
+        peer_reviews = self.peer_reviews(emp)
+        
+        weighted_peer_sum = 0.0
+        total_weight = 0.0
+        reviewer_details = []
+        
+        for reviewer, rating in peer_reviews:
+            avg_rating = np.mean(list(rating.values()))
+            similarity_row = sim_df.loc[reviewer]
+            similarity = similarity_row.drop(emp).mean() if emp in similarity_row else similarity_row.mean()
+            
+            weighted_peer_sum += avg_rating * similarity
+            total_weight += similarity
+            reviewer_details.append((reviewer, rating, similarity, avg_rating))
+        
+        weighted_peer_avg = weighted_peer_sum / total_weight if total_weight > 0 else 0.0
+        final_score = (0.7 * obj_mean + 0.3 * weighted_peer_avg) / 5.0
+        
+        status = "COMPLETE" if len(peer_reviews) >= 3 else "PENDING"
+        verdict = "APPROVED" if final_score >= 0.7 else "REJECTED"
+        
+        return {
+            'final_score': final_score,
+            'objective_scores': obj_scores.to_dict(),
+            'objective_mean': obj_mean,
+            'reviewer_details': reviewer_details,
+            'weighted_peer_avg': weighted_peer_avg,
+            'status': status,
+            'verdict': verdict
+        }
+    
+    def simple_calculate_employee_score(self, emp):
+        import pandas as pd
+        obj_scores = pd.Series(self.objective[emp].astype(int), index=self.categories)
+        obj_mean = obj_scores.mean()
+        peer_reviews = self.peer_reviews(emp)
+        
+        peer_avg = np.mean([np.mean(list(rating.values())) for _, rating in peer_reviews]) if peer_reviews else 0.0
+        final_score = (0.7 * obj_mean + 0.3 * peer_avg) / 5.0
+        
+        status = "COMPLETE" if len(peer_reviews) >= 3 else "PENDING"
+        verdict = "APPROVED" if final_score >= 0.7 else "REJECTED"
+        
+        reviewer_details = [
+            (reviewer, rating, 0.0, np.mean(list(rating.values()))) 
+            for reviewer, rating in peer_reviews
+        ]
+        
+        return {
+            'final_score': final_score,
+            'objective_scores': obj_scores.to_dict(),
+            'objective_mean': obj_mean,
+            'reviewer_details': reviewer_details,
+            'weighted_peer_avg': peer_avg,
+            'status': status,
+            'verdict': verdict
+        }
@@ -0,0 +1,154 @@
+"""Balanced reviewer -> reviewee assignment for an appraisal cycle.
+
+Employees sit on a shuffled ring. Each round maps every reviewee to the
+reviewer a fixed number of seats away, so one round is a permutation: every
+reviewer gets at most one reviewee, and no pair can repeat across rounds
+(each round uses a different distance). Reviewees whose pair is excluded in
+their round are re-seated on later distances, under a per-reviewer load cap.
+Everything is vectorized, so 100k employees plan in well under a second.
+"""
+import random
+
+import numpy as np
+
+from scoring_engine import MIN_REVIEWS
+
+# Random guesses tried before sample_unreviewed walks the org in order
+RANDOM_PROBES = 32
+
+
+class AssignmentPlan:
+    """Per-reviewer pending queues stored as CSR arrays with a cursor each."""
+
+    def __init__(self, n, reviewer, reviewee, existing_coverage):
+        order = np.argsort(reviewer, kind="stable")
+        self.targets = reviewee[order]
+        self.indptr = np.searchsorted(reviewer[order], np.arange(n + 1))
+        self.cursor = self.indptr[:-1].copy()
+        self.coverage = existing_coverage + np.bincount(reviewee, minlength=n)
+
+    def __len__(self):
+        return len(self.targets)
+
+    def load(self):
+        return np.diff(self.indptr)
+
+    def pending(self, reviewer):
+        return int(self.indptr[reviewer + 1] - self.cursor[reviewer])
+
+    def next_reviewee(self, reviewer, is_done=None):
+        """The reviewer's next assigned reviewee, or None when the queue is empty.
+
+        Assignments for which ``is_done(reviewer, reviewee)`` is true are
+        dropped; the returned one stays queued until it is done, so an
+        abandoned review is offered again.
+        """
+        end = self.indptr[reviewer + 1]
+        while self.cursor[reviewer] < end:
+            reviewee = int(self.targets[self.cursor[reviewer]])
+            if is_done is None or not is_done(reviewer, reviewee):
+                return reviewee
+            self.cursor[reviewer] += 1
+        return None
+
+
+def next_assignment(plan, reviewer, n, is_done, rng=random):
+    """The reviewee to offer ``reviewer`` next, or None when nobody is left.
+
+    Planned assignments come first so every reviewee reaches the reviews
+    needed for COMPLETE; after that, any employee not yet reviewed.
+    """
+    reviewee = plan.next_reviewee(reviewer, is_done)
+    if reviewee is None:
+        reviewee = sample_unreviewed(reviewer, n, is_done, rng)
+    return reviewee
+
+
+def sample_unreviewed(reviewer, n, is_done, rng=random, probes=RANDOM_PROBES):
+    """A random employee ``reviewer`` has not reviewed, or None when there is none.
+
+    A reviewer has reviewed only a handful of the org, so a few random probes
+    almost always land; only when they all miss is the org walked from a
+    random seat, and no list of candidates is ever built.
+    """
+    if n < 2:
+        return None
+    for _ in range(probes):
+        e = rng.randrange(n)
+        if e != reviewer and not is_done(reviewer, e):
+            return e
+    start = rng.randrange(n)
+    for step in range(n):
+        e = (start + step) % n
+        if e != reviewer and not is_done(reviewer, e):
+            return e
+    return None
+
+
+def plan_assignments(n, reviews_per_reviewee=MIN_REVIEWS, max_load=None,
+                     exclusions=None, existing=None, seed=None):
+    """Plan who reviews whom so every reviewee reaches ``reviews_per_reviewee``.
+
+    ``exclusions`` and ``existing`` are (reviewer, reviewee) index arrays of
+    shape (k, 2): excluded pairs are never assigned, and existing (already
+    submitted) reviews count toward coverage and are not assigned again.
+    ``max_load`` caps new assignments per reviewer (default: one more than the
+    target, which leaves room to re-seat excluded pairs). Reviewees that still
+    fall short are reported by ``AssignmentPlan.coverage``.
+    """
+    target = min(reviews_per_reviewee, max(n - 1, 0))
+    if max_load is None:
+        max_load = target + 1
+    rng = np.random.default_rng(seed)
+
+    existing = np.zeros((0, 2), dtype=np.int64) if existing is None else np.asarray(existing, dtype=np.int64).reshape(-1, 2)
+    exclusions = np.zeros((0, 2), dtype=np.int64) if exclusions is None else np.asarray(exclusions, dtype=np.int64).reshape(-1, 2)
+    blocked = np.unique(np.concatenate([exclusions, existing]) @ np.array([n, 1], dtype=np.int64))
+    existing_coverage = np.bincount(existing[:, 1], minlength=n)
+    need = np.maximum(target - existing_coverage, 0)
+
+    def is_blocked(keys):
+        if not len(blocked):
+            return np.zeros(len(keys), dtype=bool)
+        pos = np.searchsorted(blocked, keys)
+        return (pos < len(blocked)) & (blocked[np.minimum(pos, len(blocked) - 1)] == keys)
+
+    seat = rng.permutation(n)
+    position = np.empty(n, dtype=np.int64)
+    position[seat] = np.arange(n)
+    distances = rng.permutation(np.arange(1, n)) if n > 1 else np.zeros(0, dtype=np.int64)
+
+    load = np.zeros(n, dtype=np.int64)
+    planned_reviewer, planned_reviewee = [], []
+    short = np.zeros(n, dtype=np.int64)
+
+    # One distance per round: reviewees still needing a review get the reviewer
+    # that many seats further round the ring. A pair is fixed by its distance,
+    # so using each distance once means no pair is ever planned twice
+    rounds = int(need.max(initial=0))
+    for distance in distances[:rounds]:
+        reviewee = np.flatnonzero(need > 0)
+        reviewer = seat[(position[reviewee] + distance) % n]
+        ok = ~is_blocked(reviewer * n + reviewee) & (load[reviewer] < max_load)
+        need[reviewee] -= 1
+        short[reviewee[~ok]] += 1
+        load[reviewer[ok]] += 1
+        planned_reviewer.append(reviewer[ok])
+        planned_reviewee.append(reviewee[ok])
+
+    # Re-seat the misses on the remaining distances; a distance is still a
+    # bijection, so reviewers picked in one pass are all different
+    for distance in distances[rounds:]:
+        if not short.any():
+            break
+        reviewee = np.flatnonzero(short > 0)
+        reviewer = seat[(position[reviewee] + distance) % n]
+        ok = ~is_blocked(reviewer * n + reviewee) & (load[reviewer] < max_load)
+        short[reviewee[ok]] -= 1
+        load[reviewer[ok]] += 1
+        planned_reviewer.append(reviewer[ok])
+        planned_reviewee.append(reviewee[ok])
+
+    reviewer = np.concatenate(planned_reviewer) if planned_reviewer else np.zeros(0, dtype=np.int64)
+    reviewee = np.concatenate(planned_reviewee) if planned_reviewee else np.zeros(0, dtype=np.int64)
+    return AssignmentPlan(n, reviewer, reviewee, existing_coverage)
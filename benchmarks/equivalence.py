@@ -0,0 +1,114 @@
+"""Equivalence of every scoring backend with the legacy reference paths.
+
+Scores seeded synthetic orgs with each backend and compares the results,
+field by field, with ``AppraisalCore.analyze_with_sklearn`` (cosine
+weighting) or ``analyze_without_sklearn`` (uniform weighting) using
+``compare_results``. Each org also gets re-reviews of pairs that were
+already reviewed, which the incremental scorer receives as updates, so the
+"last review of a pair wins" rule is checked on every path. Prints the
+largest difference seen per backend and exits with status 1 on any
+difference above ``--tol``.
+
+    python -m benchmarks.equivalence --orgs 20 --employees 80
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from appraisal_core import CATEGORIES, AppraisalCore
+from incremental_scoring import IncrementalScorer
+from ingest import generate_synthetic_org
+from scoring_engine import EQUIVALENCE_TOL, compare_results
+from sharded_scoring import score_sharded
+
+# Backend and the reference it must match: cosine backends against
+# analyze_with_sklearn, uniform ones against analyze_without_sklearn
+BACKENDS = (
+    ('sparse', 'sklearn'),
+    ('numpy', 'sklearn'),
+    ('dense', 'sklearn'),
+    ('incremental', 'sklearn'),
+    ('sharded', 'sklearn'),
+    ('uniform', 'simple'),
+    ('sharded-uniform', 'simple'),
+)
+
+
+def build_org(n, reviews_per_employee, rereviews, seed):
+    """Core for a synthetic org plus its incremental scorer, after ``rereviews``
+    repeated (reviewer, reviewee) pairs with fresh ratings."""
+    core = AppraisalCore()
+    core.apply_cycle(generate_synthetic_org(n, CATEGORIES, reviews_per_employee, seed=seed))
+    core.incremental_scorer = IncrementalScorer.from_app(core)
+    rng = np.random.default_rng([seed, 1])
+    log = core.review_log.arrays()
+    for k in rng.integers(0, len(log), rereviews if len(log) else 0):
+        core.record_review(int(log.reviewer_idx[k]), int(log.reviewee_idx[k]),
+                           rng.integers(1, 6, len(core.categories)).tolist())
+    return core
+
+
+def score(core, name):
+    engine = core.scoring_engine()
+    if name in ('sparse', 'numpy', 'dense'):
+        return engine.score('cosine', name).to_dict()
+    if name == 'incremental':
+        return core.incremental_scorer.result().to_dict()
+    if name == 'sharded':
+        return score_sharded(engine, 'cosine', workers=2).to_dict()
+    if name == 'uniform':
+        return engine.score('uniform').to_dict()
+    return score_sharded(engine, 'uniform', workers=2).to_dict()
+
+
+def max_difference(expected, actual):
+    # Largest absolute difference over every float in the two result dicts
+    worst = 0.0
+    for emp, exp in expected.items():
+        act = actual.get(emp)
+        if act is None:
+            continue
+        for key in ('final_score', 'objective_mean', 'weighted_peer_avg'):
+            worst = max(worst, abs(exp[key] - act[key]))
+        for (_, _, s1, a1), (_, _, s2, a2) in zip(exp['reviewer_details'], act['reviewer_details']):
+            worst = max(worst, abs(s1 - s2), abs(a1 - a2))
+    return worst
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check every scoring backend against the legacy paths")
+    parser.add_argument("--orgs", type=int, default=20, help="seeded orgs to check")
+    parser.add_argument("--employees", type=int, default=80)
+    parser.add_argument("--rereviews", type=int, default=40, help="repeated pairs added to each org")
+    parser.add_argument("--tol", type=float, default=EQUIVALENCE_TOL)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    worst = {name: 0.0 for name, _ in BACKENDS}
+    failures = {name: [] for name, _ in BACKENDS}
+    for i in range(args.orgs):
+        seed = args.seed + i
+        # Sparse orgs leave some employees PENDING, denser ones COMPLETE
+        core = build_org(args.employees, 1 + i % 5, args.rereviews, seed)
+        expected = {'sklearn': core.analyze_with_sklearn(), 'simple': core.analyze_without_sklearn()}
+        for name, reference in BACKENDS:
+            actual = score(core, name)
+            worst[name] = max(worst[name], max_difference(expected[reference], actual))
+            failures[name] += [f"org {seed}: {problem}"
+                               for problem in compare_results(expected[reference], actual, args.tol)]
+
+    print(f"{args.orgs} orgs of {args.employees} employees, {args.rereviews} re-reviews each, tol {args.tol:g}")
+    print(f"{'backend':<16} {'reference':<24} {'max diff':>10} {'problems':>9}")
+    for name, reference in BACKENDS:
+        label = 'analyze_with_sklearn' if reference == 'sklearn' else 'analyze_without_sklearn'
+        print(f"{name:<16} {label:<24} {worst[name]:>10.3g} {len(failures[name]):>9}")
+    problems = [problem for name in failures for problem in failures[name]]
+    for problem in problems[:20]:
+        print(problem)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Memory of the appraisal data model: name-keyed dicts vs compact arrays.
+
+Builds the same synthetic cycle both ways and reports the bytes each one
+allocates, as measured by tracemalloc.
+
+    python -m benchmarks.memory_model --employees 1000 10000 100000
+"""
+import argparse
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from appraisal_core import CATEGORIES, AppraisalCore
+from ingest import generate_synthetic_org
+
+
+def build_name_keyed(cycle):
+    # The structures the GUI kept before employees became integer ids
+    employees = list(cycle.names)
+    employee_codes = dict(zip(cycle.names, cycle.codes))
+    objective_details = pd.DataFrame(np.asarray(cycle.objective, dtype=np.int64),
+                                     index=employees, columns=cycle.categories)
+    reviews = defaultdict(list)
+    reviewed_pairs = set()
+    reviews_data = cycle.reviews
+    for reviewer, reviewee, ratings in zip(reviews_data.reviewer_idx.tolist(), reviews_data.reviewee_idx.tolist(),
+                                           reviews_data.ratings.tolist()):
+        reviews[employees[reviewee]].append((employees[reviewer], dict(zip(cycle.categories, ratings))))
+        reviewed_pairs.add((employees[reviewer], employees[reviewee]))
+    return employees, employee_codes, objective_details, reviews, reviewed_pairs
+
+
+def build_compact(cycle):
+    core = AppraisalCore()
+    core.apply_cycle(cycle)
+    n = len(cycle.codes)
+    pairs = np.unique(cycle.reviews.reviewer_idx.astype(np.int64) * n + cycle.reviews.reviewee_idx)
+    return core, pairs
+
+
+def measure(build, cycle):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    state = build(cycle)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del state
+    return allocated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the memory of the appraisal data models")
+    parser.add_argument("--employees", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--reviews-per-employee", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'employees':>10} {'reviews':>10} {'name-keyed':>12} {'compact':>12} {'B/review':>16} {'ratio':>6}")
+    for n in args.employees:
+        cycle = generate_synthetic_org(n, CATEGORIES, reviews_per_employee=args.reviews_per_employee,
+                                       seed=args.seed)
+        # Unique names, or the name-keyed model would merge colliding employees
+        cycle.names = [f"{name} {i}" for i, name in enumerate(cycle.names)]
+        m = len(cycle.reviews)
+        legacy = measure(build_name_keyed, cycle)
+        compact = measure(build_compact, cycle)
+        per_review = f"{legacy / max(m, 1):.0f} -> {compact / max(m, 1):.0f}"
+        print(f"{n:>10} {m:>10} {legacy / 2**20:>10.1f}MB {compact / 2**20:>10.1f}MB "
+              f"{per_review:>16} {legacy / max(compact, 1):>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
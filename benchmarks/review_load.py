@@ -0,0 +1,213 @@
+"""Load test for the review service: many reviewers submitting at once.
+
+Starts ``review_service.py`` on a fresh synthetic cycle in a subprocess (or
+targets ``--url``), then runs one asyncio task per simulated reviewer, each
+on its own keep-alive connection: ask for an assignment, submit ratings,
+repeat. The default of six reviews each runs past every reviewer's planned
+queue, so assignments beyond the plan (random sampling) are measured too.
+With ``--race`` every reviewer also submits its first review a second time
+on another connection at the same moment, and exactly one of the two must be
+accepted. Reports p50/p99/max latency per request type, split into planned
+and beyond-plan assignments, throughput, and the service's batch counts;
+after a local run the store is reopened to check every accepted review was
+written once.
+
+    python -m benchmarks.review_load --employees 5000 --reviewers 2000 --reviews-each 6 --race
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from review_store import ReviewStore
+
+STARTUP_TIMEOUT = 60
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+class LoadStats:
+    def __init__(self):
+        self.latency = {'planned': [], 'unplanned': [], 'submit': []}
+        self.status = {}
+        self.races = 0
+        self.race_failures = 0
+
+    def timed(self, kind, start, status):
+        self.latency[kind].append(time.perf_counter() - start)
+        self.status[status] = self.status.get(status, 0) + 1
+
+
+async def reviewer_session(host, port, connection, reviewer, reviews_each, n_categories, race, rng, stats):
+    reader, writer = connection
+    try:
+        for i in range(reviews_each):
+            start = time.perf_counter()
+            status, body = await request(reader, writer, 'GET', f'/assignment?reviewer={reviewer}')
+            stats.timed('planned' if body.get('planned') else 'unplanned', start, status)
+            if body.get('reviewee') is None:
+                return
+            review = {'reviewer': reviewer, 'reviewee': body['reviewee'],
+                      'ratings': rng.integers(1, 6, n_categories).tolist()}
+            if race and i == 0:
+                await race_submission(host, port, reader, writer, review, stats)
+                continue
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, 'POST', '/reviews', review)
+            stats.timed('submit', start, status)
+    finally:
+        writer.close()
+
+
+async def race_submission(host, port, reader, writer, review, stats):
+    other_reader, other_writer = await asyncio.open_connection(host, port)
+    try:
+        async def submit(r, w):
+            start = time.perf_counter()
+            status, _ = await request(r, w, 'POST', '/reviews', review)
+            stats.timed('submit', start, status)
+            return status
+        statuses = sorted(await asyncio.gather(submit(reader, writer), submit(other_reader, other_writer)))
+    finally:
+        other_writer.close()
+    stats.races += 1
+    if statuses != [201, 409]:
+        stats.race_failures += 1
+
+
+async def run_load(url, reviewers, reviews_each, race, seed):
+    address = urlsplit(url)
+    host, port = address.hostname, address.port
+    reader, writer = await asyncio.open_connection(host, port)
+    _, cycle = await request(reader, writer, 'GET', '/cycle')
+    n = len(cycle['codes'])
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(n, size=min(reviewers, n), replace=False)
+
+    # Every reviewer connects before the clock starts
+    connections = await asyncio.gather(*(asyncio.open_connection(host, port) for _ in chosen))
+    stats = LoadStats()
+    start = time.perf_counter()
+    await asyncio.gather(*(reviewer_session(host, port, connection, int(r), reviews_each, len(cycle['categories']),
+                                            race, np.random.default_rng([seed, int(r)]), stats)
+                           for connection, r in zip(connections, chosen)))
+    elapsed = time.perf_counter() - start
+
+    _, service_stats = await request(reader, writer, 'GET', '/stats')
+    writer.close()
+    return stats, elapsed, service_stats, len(chosen)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_service(store_path, employees, seed):
+    port = free_port()
+    process = subprocess.Popen([sys.executable, "review_service.py", "--store", store_path, "--port", str(port),
+                                "--synthetic", str(employees), "--seed", str(seed)])
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("review service exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("review service did not start")
+
+
+def percentiles(values):
+    values = np.asarray(values) * 1000
+    return np.percentile(values, 50), np.percentile(values, 99), values.max()
+
+
+def report(stats, elapsed, service_stats, n_reviewers):
+    requests = sum(len(v) for v in stats.latency.values())
+    print(f"{n_reviewers} concurrent reviewers, {requests} requests in {elapsed:.2f}s "
+          f"({requests / elapsed:,.0f} req/s)")
+    print(f"{'request':<12} {'count':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    assignments = stats.latency['planned'] + stats.latency['unplanned']
+    rows = [('assignment', assignments), ('  planned', stats.latency['planned']),
+            ('  beyond', stats.latency['unplanned']), ('submit', stats.latency['submit'])]
+    for kind, values in rows:
+        if values:
+            p50, p99, worst = percentiles(values)
+            print(f"{kind:<12} {len(values):>8} {p50:>9.2f} {p99:>9.2f} {worst:>9.2f}")
+    print("status codes: " + ", ".join(f"{code}: {count}" for code, count in sorted(stats.status.items())))
+    batches = service_stats['batches_written']
+    accepted = service_stats['reviews_accepted']
+    print(f"service: {accepted} reviews accepted in {batches} batches "
+          f"({accepted / max(batches, 1):.1f} per batch), {service_stats['reviews_rejected']} rejected")
+    if stats.races:
+        print(f"duplicate races: {stats.races}, exactly one accepted in {stats.races - stats.race_failures}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the review service")
+    parser.add_argument("--url", help="existing service to target (default: start one)")
+    parser.add_argument("--employees", type=int, default=5000)
+    parser.add_argument("--reviewers", type=int, default=2000, help="concurrent simulated reviewers")
+    parser.add_argument("--reviews-each", type=int, default=6,
+                        help="reviews per reviewer; more than the plan's 3-4 exhausts the queues")
+    parser.add_argument("--race", action="store_true", help="submit each first review twice concurrently")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    process = None
+    workdir = None
+    url = args.url
+    if url is None:
+        workdir = tempfile.TemporaryDirectory()
+        store_path = os.path.join(workdir.name, "load.db")
+        process, url = start_service(store_path, args.employees, args.seed)
+    try:
+        stats, elapsed, service_stats, n_reviewers = asyncio.run(
+            run_load(url, args.reviewers, args.reviews_each, args.race, args.seed))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    report(stats, elapsed, service_stats, n_reviewers)
+
+    failed = stats.race_failures > 0
+    if workdir is not None:
+        store = ReviewStore(store_path)
+        written = len(store.load().reviews)
+        store.close()
+        print(f"store: {written} reviews written")
+        failed = failed or written != service_stats['reviews_accepted']
+        workdir.cleanup()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Scaling of sharded scoring with the number of worker processes.
+
+Scores a synthetic org single-process and with 1, 2, 4, ... workers up to
+the CPU count, and checks each result is bit-for-bit the single-process one.
+By default everyone may review anyone, so the review graph is one connected
+component; ``--departments`` keeps reviews inside departments instead, which
+the sharded path does not depend on either.
+
+    python -m benchmarks.sharding --employees 1000000
+    python -m benchmarks.sharding --employees 1000000 --departments 5000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from appraisal_core import CATEGORIES, AppraisalCore
+from ingest import generate_synthetic_org
+from sharded_scoring import score_sharded
+
+FIELDS = ('order', 'objective_mean', 'weighted_peer_avg', 'final_score', 'review_count',
+          'review_weight', 'review_avg')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure sharded scoring speedup")
+    parser.add_argument("--employees", type=int, default=300000)
+    parser.add_argument("--departments", type=int, default=None)
+    parser.add_argument("--reviews-per-employee", type=int, default=5)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    core = AppraisalCore()
+    core.apply_cycle(generate_synthetic_org(args.employees, CATEGORIES, args.reviews_per_employee,
+                                            seed=args.seed, departments=args.departments))
+    engine = core.scoring_engine()
+
+    start = time.perf_counter()
+    expected = engine.score('cosine', 'sparse')
+    baseline = time.perf_counter() - start
+    print(f"{'single process':<16} {baseline:8.3f}s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        start = time.perf_counter()
+        result = score_sharded(engine, 'cosine', workers)
+        elapsed = time.perf_counter() - start
+        identical = all(np.array_equal(getattr(expected, f), getattr(result, f)) for f in FIELDS)
+        print(f"{workers:>3} workers      {elapsed:8.3f}s  speedup {baseline / elapsed:5.2f}x  "
+              f"{'identical' if identical else 'DIFFERENT'}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Cold-start time of the GUI.
+
+Each run starts a fresh interpreter, so nothing is cached in-process. The
+import measurement needs no display; ``--window`` also builds the main
+window on a throwaway store and waits for the first full update (needs a
+display, e.g. under xvfb-run).
+
+    python -m benchmarks.startup --runs 5
+    xvfb-run python -m benchmarks.startup --window
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import employee_appraisal_gui
+elapsed = time.perf_counter() - start
+heavy = [m for m in ('pandas', 'scipy', 'sklearn', 'pyarrow') if m in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+WINDOW_SNIPPET = """
+import os, sys, tempfile, time
+start = time.perf_counter()
+import tkinter as tk
+import employee_appraisal_gui
+root = tk.Tk()
+store = os.path.join(tempfile.mkdtemp(), "startup.db")
+app = employee_appraisal_gui.EmployeeAppraisalSystem(root, store_path=store)
+root.update()
+elapsed = time.perf_counter() - start
+heavy = [m for m in ('pandas', 'scipy', 'sklearn', 'pyarrow') if m in sys.modules]
+root.destroy()
+print(elapsed, ",".join(heavy))
+"""
+
+
+def time_snippet(snippet, runs):
+    timings = []
+    heavy = ""
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True)
+        if out.returncode != 0:
+            raise SystemExit(out.stderr.strip().splitlines()[-1])
+        elapsed, heavy = (out.stdout.strip().split(" ") + [""])[:2]
+        timings.append(float(elapsed))
+    return timings, heavy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure GUI cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--window", action="store_true", help="also time building the main window")
+    args = parser.parse_args(argv)
+
+    measurements = [("import employee_appraisal_gui", IMPORT_SNIPPET)]
+    if args.window:
+        measurements.append(("import + main window", WINDOW_SNIPPET))
+    for label, snippet in measurements:
+        timings, heavy = time_snippet(snippet, args.runs)
+        print(f"{label:<32} median {statistics.median(timings) * 1000:7.1f} ms  "
+              f"min {min(timings) * 1000:7.1f} ms  heavy modules loaded: {heavy or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Benchmark suite for matrix building, similarity, scoring and rendering.
+
+Every stage runs on seeded synthetic orgs of each requested size and review
+density and reports wall time (best of ``--repeat`` runs), tracemalloc peak
+memory and throughput (reviews or employees per second). Results go to a
+JSON file; ``--baseline`` compares them with an earlier file and exits with
+status 1 when a stage got slower or bigger than the allowed tolerance.
+
+Stages whose cost is quadratic in the number of employees (the legacy
+pandas reference path, the dense N x N similarity) are skipped above their
+size limit. Rendering uses a stub Text widget unless ``--tk`` is given, in
+which case a real one is created (needs a display, e.g. under xvfb-run).
+
+    python -m benchmarks.suite --sizes 10 1000 10000 100000 -o bench.json
+    python -m benchmarks.suite -o new.json --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from appraisal_core import CATEGORIES, AppraisalCore, sklearn_available
+from incremental_scoring import IncrementalScorer
+from ingest import generate_synthetic_org
+from scoring_engine import ScoringEngine, approval_counts, sweep_verdicts, user_item_matrix
+from sparse_similarity import scipy_available, build_sparse_user_item_matrix
+
+DEFAULT_SIZES = [10, 1000, 10000, 100000]
+DEFAULT_DENSITIES = [3, 10]
+LEGACY_LIMIT = 1000
+DENSE_LIMIT = 5000
+INCREMENTAL_LIMIT = 2000
+RENDER_SAMPLE = 200
+SWEEP_WEIGHTS = [(w, round(1 - w, 2)) for w in np.round(np.arange(0.5, 0.901, 0.05), 2)]
+SWEEP_THRESHOLDS = np.round(np.arange(0.5, 0.901, 0.05), 2)
+
+
+class StubText:
+    """Stands in for tk.Text: keeps the inserted strings."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def insert(self, index, text):
+        self.chunks.append(text)
+
+    def delete(self, start, end=None):
+        self.chunks = []
+
+
+def make_core(n, density, seed):
+    core = AppraisalCore()
+    core.apply_cycle(generate_synthetic_org(n, CATEGORIES, reviews_per_employee=density, seed=seed))
+    return core
+
+
+# Each stage takes a core and returns (run, items): run() does the measured
+# work, items is what throughput is counted in. None means the stage does
+# not apply at this size.
+
+def stage_legacy_matrix(core):
+    if len(core.employees) > LEGACY_LIMIT:
+        return None
+    return core.build_user_item_matrix, len(core.review_log)
+
+
+def stage_legacy_sklearn(core):
+    if len(core.employees) > LEGACY_LIMIT or not sklearn_available:
+        return None
+    return core.analyze_with_sklearn, len(core.review_log)
+
+
+def stage_legacy_simple(core):
+    if len(core.employees) > LEGACY_LIMIT:
+        return None
+    return core.analyze_without_sklearn, len(core.review_log)
+
+
+def stage_dense_matrix(core):
+    if len(core.employees) > DENSE_LIMIT:
+        return None
+    reviews = core.review_log.arrays()
+    return lambda: user_item_matrix(len(core.employees), reviews), len(reviews)
+
+
+def stage_sparse_matrix(core):
+    if not scipy_available:
+        return None
+    reviews = core.review_log.arrays()
+    return lambda: build_sparse_user_item_matrix(len(core.employees), reviews), len(reviews)
+
+
+def engine_stage(weighting, backend='auto', limit=None, requires=True):
+    def stage(core):
+        if not requires or (limit is not None and len(core.employees) > limit):
+            return None
+        engine = ScoringEngine.from_app(core)
+        return lambda: engine.score(weighting, backend), len(engine.reviews)
+    return stage
+
+
+def stage_sweep(core):
+    result = ScoringEngine.from_app(core).score('uniform')
+
+    def run():
+        final, _ = sweep_verdicts(result, SWEEP_WEIGHTS, [])
+        approval_counts(final, SWEEP_THRESHOLDS)
+    return run, len(result)
+
+
+def stage_incremental(core):
+    if len(core.employees) > INCREMENTAL_LIMIT:
+        return None
+    reviews = core.review_log.arrays()
+    rows = list(zip(reviews.reviewer_idx.tolist(), reviews.reviewee_idx.tolist(), reviews.ratings.tolist()))
+
+    def run():
+        scorer = IncrementalScorer(core.employees, core.categories, core.objective)
+        for reviewer, reviewee, ratings in rows:
+            scorer.add_review(reviewer, reviewee, ratings)
+    return run, len(rows)
+
+
+def render_stage(use_tk):
+    def stage(core):
+        # Imported here so the scoring stages never need tkinter
+        from employee_appraisal_gui import EmployeeAppraisalSystem
+        app = object.__new__(EmployeeAppraisalSystem)
+        app.employees, app.employee_ids = core.employees, core.employee_ids
+        if use_tk:
+            import tkinter as tk
+            root = tk.Tk()
+            root.withdraw()
+            app.results_text = tk.Text(root)
+        else:
+            app.results_text = StubText()
+        result = ScoringEngine.from_app(core).score('uniform')
+        sample = result.order[:RENDER_SAMPLE]
+        details = [(int(i), result.details(i)) for i in sample]
+
+        def run():
+            for emp, emp_details in details:
+                app.results_text.delete(1.0, "end")
+                app.format_employee_results(emp, emp_details)
+        return run, len(details)
+    return stage
+
+
+def build_stages(use_tk):
+    return [
+        ('legacy_user_item_matrix', stage_legacy_matrix),
+        ('legacy_analyze_with_sklearn', stage_legacy_sklearn),
+        ('legacy_analyze_without_sklearn', stage_legacy_simple),
+        ('user_item_matrix_dense', stage_dense_matrix),
+        ('user_item_matrix_sparse', stage_sparse_matrix),
+        ('score_cosine_dense', engine_stage('cosine', 'dense', DENSE_LIMIT, sklearn_available)),
+        ('score_cosine_numpy', engine_stage('cosine', 'numpy', DENSE_LIMIT)),
+        ('score_cosine_sparse', engine_stage('cosine', 'sparse', requires=scipy_available)),
+        ('score_topk', engine_stage('topk')),
+        ('score_uniform', engine_stage('uniform')),
+        ('score_category_zscore', engine_stage('category', 'zscore', requires=scipy_available)),
+        ('sweep_verdicts', stage_sweep),
+        ('incremental_add_review', stage_incremental),
+        ('format_employee_results', render_stage(use_tk)),
+    ]
+
+
+def measure(run, repeat, memory=True):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    # Memory is measured on a separate run so tracing does not skew the timings
+    peak = None
+    if memory:
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_suite(sizes, densities, stages, repeat=3, seed=0, memory=True, only=None, log=None):
+    results = []
+    for n in sizes:
+        for density in densities:
+            core = make_core(n, density, seed)
+            for name, stage in stages:
+                if only and name not in only:
+                    continue
+                prepared = stage(core)
+                if prepared is None:
+                    continue
+                run, items = prepared
+                seconds, peak = measure(run, repeat, memory)
+                row = {
+                    'stage': name,
+                    'employees': n,
+                    'density': density,
+                    'reviews': len(core.review_log),
+                    'items': items,
+                    'seconds': seconds,
+                    'peak_bytes': peak,
+                    'throughput': items / seconds if seconds > 0 else None
+                }
+                results.append(row)
+                if log is not None:
+                    log(row)
+    return results
+
+
+def result_key(row):
+    return row['stage'], row['employees'], row['density']
+
+
+def compare(baseline, results, tolerance, min_seconds=0.01):
+    """Stages slower, or with a higher peak, than baseline * (1 + tolerance)."""
+    previous = {result_key(row): row for row in baseline}
+    regressions = []
+    for row in results:
+        old = previous.get(result_key(row))
+        if old is None:
+            continue
+        # Stages under 10 ms are too noisy to hold to a ratio
+        if row['seconds'] > min_seconds and row['seconds'] > old['seconds'] * (1 + tolerance):
+            regressions.append(f"{row['stage']} n={row['employees']} d={row['density']}: "
+                               f"{old['seconds']:.4f}s -> {row['seconds']:.4f}s")
+        if row['peak_bytes'] and old.get('peak_bytes') and row['peak_bytes'] > old['peak_bytes'] * (1 + tolerance):
+            regressions.append(f"{row['stage']} n={row['employees']} d={row['density']}: "
+                               f"peak {old['peak_bytes']} -> {row['peak_bytes']} bytes")
+    return regressions
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'sklearn': sklearn_available,
+        'scipy': scipy_available
+    }
+
+
+def print_row(row):
+    peak = f"{row['peak_bytes'] / 2**20:9.1f}MB" if row['peak_bytes'] is not None else f"{'-':>11}"
+    print(f"{row['stage']:<32} {row['employees']:>7} {row['density']:>4} {row['seconds']:>10.4f}s "
+          f"{peak} {row['throughput']:>14,.0f}/s", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the appraisal pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--densities", type=int, nargs="+", default=DEFAULT_DENSITIES,
+                        help="reviews written per employee")
+    parser.add_argument("--stages", nargs="+", help="run only these stages")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--tk", action="store_true", help="render into a real Text widget")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="earlier JSON results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown or memory growth against the baseline")
+    args = parser.parse_args(argv)
+
+    stages = build_stages(args.tk)
+    unknown = set(args.stages or ()) - {name for name, _ in stages}
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    print(f"{'stage':<32} {'n':>7} {'dens':>4} {'time':>11} {'peak':>11} {'throughput':>16}")
+    results = run_suite(args.sizes, args.densities, stages, repeat=args.repeat, seed=args.seed,
+                        memory=not args.no_memory, only=args.stages, log=print_row)
+    report = {
+        'environment': environment(),
+        'settings': {'seed': args.seed, 'repeat': args.repeat, 'tolerance': args.tolerance},
+        'results': results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(baseline, results, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""Cooperative cancellation for analyses running on a worker thread.
+
+The caller hands a ``threading.Event`` down the scoring path. Each stage calls
+``check_cancelled`` between steps and once per batch, and it raises
+``AnalysisCancelled`` as soon as the event is set. ``None`` means the run
+cannot be cancelled.
+"""
+
+
+class AnalysisCancelled(Exception):
+    """Raised inside a scoring run once its cancel event is set."""
+
+
+def check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise AnalysisCancelled("analysis cancelled")
@@ -0,0 +1,190 @@
+"""Category-level collaborative filtering with reviewer-bias correction.
+
+The mean-based weighting collapses each review to the average of its
+category ratings before similarity is computed, and counts a lenient
+reviewer's 5s the same as a harsh reviewer's. Here reviews stay a
+reviewer x reviewee x category tensor, stored as a CSR matrix with the
+reviewee and category axes flattened into (n * n_categories) columns, so
+memory grows with reviews times categories and never with N squared.
+
+Ratings are first corrected for each reviewer's bias:
+
+    'none'    raw ratings
+    'center'  rating - reviewer mean
+    'zscore'  (rating - reviewer mean) / reviewer standard deviation
+
+Reviewer means and deviations are shrunk towards the org-wide values by
+``prior_reviews`` reviews' worth of ratings, so a reviewer with a single
+review is not centred on that one review. Similarity is the cosine between
+reviewers' corrected tensor rows (two reviewers are alike when they rate the
+same people the same way category by category); a review's weight is the
+reviewer's mean similarity to the others, as in the cosine mode, floored at
+zero. The peer score averages corrected ratings mapped back onto the 1-5
+scale with the org-wide mean and deviation.
+"""
+import numpy as np
+
+from cancellation import check_cancelled
+from instrumentation import metrics
+from scoring_engine import ScoreResult, OBJECTIVE_WEIGHT, PEER_WEIGHT, MAX_RATING
+from sparse_similarity import PAIR_BATCH, scipy_available, similarity_row_sums, pairwise_similarity
+
+BIAS_MODES = ('none', 'center', 'zscore')
+DEFAULT_BIAS = 'zscore'
+PRIOR_REVIEWS = 2
+
+
+def reviewer_bias(n, reviews, prior_reviews=PRIOR_REVIEWS):
+    """Per-reviewer (mean, std) of all the ratings they gave, shrunk towards the
+    org-wide values; also returns the org-wide (mean, std)."""
+    ratings = reviews.ratings
+    n_categories = ratings.shape[1]
+    reviewer = reviews.reviewer_idx
+    # Row sums in float64 straight from the stored ratings, no full-size copy
+    row_sum = ratings.sum(axis=1, dtype=np.float64)
+    row_sq = np.einsum("ij,ij->i", ratings, ratings, dtype=np.float64)
+    count = np.bincount(reviewer, minlength=n) * n_categories
+    total = np.bincount(reviewer, weights=row_sum, minlength=n)
+    total_sq = np.bincount(reviewer, weights=row_sq, minlength=n)
+
+    n_ratings = max(ratings.size, 1)
+    global_mean = row_sum.sum() / n_ratings
+    global_var = max(row_sq.sum() / n_ratings - global_mean ** 2, 0.0)
+    prior = prior_reviews * n_categories
+    denominator = np.maximum(count + prior, 1)
+    mean = (total + prior * global_mean) / denominator
+    second_moment = (total_sq + prior * (global_var + global_mean ** 2)) / denominator
+    std = np.sqrt(np.maximum(second_moment - mean ** 2, 0.0))
+    return mean, std, global_mean, np.sqrt(global_var)
+
+
+def corrected_ratings(n, reviews, bias=DEFAULT_BIAS, prior_reviews=PRIOR_REVIEWS):
+    """(deviations, adjusted) per review and category.
+
+    ``deviations`` are the bias-corrected values similarity is computed on;
+    ``adjusted`` are the same ratings back on the 1-5 scale.
+    """
+    if bias not in BIAS_MODES:
+        raise ValueError(f"Unknown bias correction: {bias}")
+    # Always a copy: the corrections below work in place, and float64 ratings
+    # would otherwise be the caller's own array
+    ratings = np.array(reviews.ratings, dtype=np.float64)
+    if bias == 'none':
+        return ratings, ratings
+    mean, std, global_mean, global_std = reviewer_bias(n, reviews, prior_reviews)
+    reviewer = reviews.reviewer_idx
+    # Worked in place: these are the two largest arrays of the scoring run
+    deviations = ratings
+    deviations -= mean[reviewer][:, None]
+    if bias == 'zscore':
+        inverse = np.divide(1.0, std, out=np.zeros_like(std), where=std > 0)
+        deviations *= inverse[reviewer][:, None]
+        adjusted = deviations * global_std
+    else:
+        adjusted = deviations.copy()
+    adjusted += global_mean
+    return deviations, np.clip(adjusted, 1.0, MAX_RATING, out=adjusted)
+
+
+def build_review_tensor(n, reviews, values, normalize=False):
+    """CSR reviewer x (reviewee * n_categories + category) matrix of ``values``
+    (last review per pair wins), with each row scaled to unit length when
+    ``normalize`` is set."""
+    import scipy.sparse as sp
+    # CSR arrays are built directly, reviews ordered by (reviewer, reviewee)
+    # so rows come in order with ascending columns, rather than through COO,
+    # which would hold int64 row and column copies of every entry
+    keep = reviews.last_per_pair(n)
+    keep = keep[np.lexsort((reviews.reviewee_idx[keep], reviews.reviewer_idx[keep]))]
+    reviewer, reviewee = reviews.reviewer_idx[keep], reviews.reviewee_idx[keep]
+    data = values[keep]
+    if normalize:
+        # Row norms come from the review rows, so the tensor is never copied
+        # to be normalized; all-zero rows stay zero, as in normalize_rows
+        norms = np.sqrt(np.bincount(reviewer, weights=np.einsum("ij,ij->i", data, data), minlength=n))
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        data *= inverse[reviewer][:, None]
+    n_categories = values.shape[1]
+    index_dtype = np.int32 if n * n_categories < 2 ** 31 else np.int64
+    indices = (reviewee.astype(index_dtype)[:, None] * n_categories
+               + np.arange(n_categories, dtype=index_dtype)).ravel()
+    indptr = np.zeros(n + 1, dtype=index_dtype)
+    np.cumsum(np.bincount(reviewer, minlength=n) * n_categories, out=indptr[1:])
+    return sp.csr_matrix((data.ravel(), indices, indptr), shape=(n, n * n_categories))
+
+
+def category_review_weights(n, reviews, values, cancel=None):
+    # (row sum - sim[reviewer, reviewee]) / (n - 1) on the tensor rows, as in
+    # the cosine mode; corrected values can anti-correlate, so floor at zero
+    with metrics.span("analysis.review_tensor"):
+        unit = build_review_tensor(n, reviews, values, normalize=True)
+    check_cancelled(cancel)
+    row_sum = similarity_row_sums(unit)
+    rv, re = reviews.reviewer_idx, reviews.reviewee_idx
+    # Tensor rows hold n_categories entries per review, so fewer pairs per
+    # batch keep the temporaries the size the cosine mode uses
+    pairs = pairwise_similarity(unit, rv, re, batch=max(PAIR_BATCH // values.shape[1], 1), cancel=cancel)
+    weight = (row_sum[rv] - pairs) / max(n - 1, 1)
+    return np.maximum(weight, 0.0)
+
+
+class CategoryScoreResult(ScoreResult):
+    """ScoreResult plus each employee's weighted, bias-corrected peer score per category."""
+
+    def __init__(self, engine, order, objective_mean, weighted_peer_avg, final_score,
+                 review_count, review_weight, review_avg, category_peer, bias):
+        super().__init__(engine, order, objective_mean, weighted_peer_avg, final_score,
+                         review_count, review_weight, review_avg)
+        self.category_peer = category_peer
+        self.bias = bias
+
+    def details(self, i):
+        details = super().details(i)
+        details['category_peer_scores'] = dict(zip(self.engine.categories, self.category_peer[i].tolist()))
+        return details
+
+
+def score_by_category(engine, bias=DEFAULT_BIAS, prior_reviews=PRIOR_REVIEWS, cancel=None):
+    """Score ``engine``'s cycle with category-aware, bias-corrected peer weighting.
+
+    Per-review ``review_avg`` in the result is the corrected mean rating. An
+    employee whose reviews all get zero weight falls back to their unweighted
+    corrected mean.
+    """
+    if not scipy_available:
+        raise RuntimeError("category scoring requires scipy")
+    n = len(engine.employees)
+    reviews = engine.reviews
+    reviewee = reviews.reviewee_idx
+
+    with metrics.span("analysis.bias_correction"):
+        deviations, adjusted = corrected_ratings(n, reviews, bias, prior_reviews)
+    check_cancelled(cancel)
+    with metrics.span("analysis.similarity"):
+        weight = category_review_weights(n, reviews, deviations, cancel)
+    check_cancelled(cancel)
+
+    with metrics.span("analysis.scoring"):
+        review_count = np.bincount(reviewee, minlength=n)
+        total_weight = np.bincount(reviewee, weights=weight, minlength=n)
+        # Employees with no positive weight fall back to equal weights
+        unweighted = total_weight[reviewee] <= 0
+        effective = np.where(unweighted, 1.0, weight)
+        effective_total = np.bincount(reviewee, weights=effective, minlength=n)
+        category_peer = np.zeros((n, adjusted.shape[1]))
+        for j in range(adjusted.shape[1]):
+            category_sum = np.bincount(reviewee, weights=adjusted[:, j] * effective, minlength=n)
+            np.divide(category_sum, effective_total, out=category_peer[:, j], where=effective_total > 0)
+        review_avg = adjusted.mean(axis=1)
+        weighted_sum = np.bincount(reviewee, weights=review_avg * effective, minlength=n)
+        weighted_peer_avg = np.divide(weighted_sum, effective_total, out=np.zeros(n), where=effective_total > 0)
+
+        objective_mean = engine.objective.mean(axis=1)
+        final_score = (OBJECTIVE_WEIGHT * objective_mean + PEER_WEIGHT * weighted_peer_avg) / MAX_RATING
+
+        _, first = np.unique(reviewee, return_index=True)
+        order = reviewee[np.sort(first)]
+    metrics.count("reviews_processed", len(reviews))
+    metrics.count("employees_scored", len(order))
+    return CategoryScoreResult(engine, order, objective_mean, weighted_peer_avg, final_score,
+                               review_count, weight, review_avg, category_peer, bias)
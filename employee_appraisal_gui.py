@@ -1,20 +1,28 @@
+import argparse
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import random
-import pandas as pd
-import numpy as np
-from collections import defaultdict
+from tkinter import ttk, messagebox, scrolledtext, filedialog
+from appraisal_core import AppraisalCore, warm_up
+from cancellation import AnalysisCancelled
+from incremental_scoring import IncrementalScorer
+from instrumentation import metrics
+from assignment import next_assignment, plan_assignments
+from review_store import ReviewStore
+from ingest import generate_synthetic_org, load_org
+from results_view import VirtualResultsTable
+from review_form import ReviewForm
+from rubric import load_rubric
+from scoring_engine import DEFAULT_NEIGHBOURS
 
-# Handle sklearn import with fallback
-try:
-    from sklearn.metrics.pairwise import cosine_similarity
-    sklearn_available = True
-except ImportError:
-    sklearn_available = False
-    messagebox.showwarning("Warning", "scikit-learn not found. Using simplified scoring.")
+DEFAULT_STORE_PATH = "appraisal_cycle.db"
+FLUSH_INTERVAL_MS = 2000
+ANALYSIS_POLL_MS = 50
 
-class EmployeeAppraisalSystem:
-    def __init__(self, root):
+class EmployeeAppraisalSystem(AppraisalCore):
+    def __init__(self, root, store_path=DEFAULT_STORE_PATH, import_paths=None, server_url=None):
+        super().__init__()
         self.root = root
         self.root.title("Employee Appraisal System")
         self.root.geometry("1000x800")
@@ -33,19 +41,46 @@ class EmployeeAppraisalSystem:
             'button_text': "white"
         }
         
-        self.categories = [
-            'Productivity', 'Teamwork', 'Innovation', 'Communication',
-            'Leadership', 'Problem Solving', 'Adaptability', 'Quality of Work'
-        ]
-        self.employees = []
-        self.employee_codes = {}
-        self.objective_details = pd.DataFrame()
-        self.reviews = defaultdict(list)
-        self.reviewed_pairs = set()
+        self.flush_scheduled = False
+        self.analysis_thread = None
+        self.analysis_cancel = None
+        self.analysis_queue = None
+        self.analysis_started = None
+        self.results = None
         
         self.configure_styles()
-        self.generate_demo_employees(10)  # Generate demo data first
+        
+        # Work as a client of a review service, start a cycle from imported
+        # HR data, reload the saved one, or fall back to demo data
+        self.client = None
+        if server_url:
+            # Imported here so standalone startup does not load asyncio and urllib
+            from review_service import ReviewClient
+            self.client = ReviewClient(server_url)
+        self.store = None if self.client else ReviewStore(store_path)
+        if self.client:
+            self.apply_cycle(self.client.cycle())
+            self.sync_reviews()
+        elif import_paths:
+            cycle = load_org(*import_paths, self.categories)
+            self.store.save_cycle(cycle)
+            self.apply_cycle(cycle)
+        elif self.store.is_empty():
+            self.generate_demo_employees(10)  # Generate demo data first
+        else:
+            self.load_cycle()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        self.rubric = load_rubric(self.categories)
+        self.incremental_scorer = IncrementalScorer.from_app(self)
+        # A service plans assignments for all its clients
+        self.assignments = None if self.client else plan_assignments(len(self.employees),
+                                                                      existing=self.store.reviewed_pairs())
         self.create_main_interface()      # Then create interface
+        
+        # Load the analysis libraries once the window is up, so the first
+        # "Generate Results" does not pay for the imports
+        self.root.after_idle(lambda: threading.Thread(target=warm_up, daemon=True).start())
     
     def configure_styles(self):
         style = ttk.Style()
@@ -77,20 +112,47 @@ class EmployeeAppraisalSystem:
                  selectbackground=[('readonly', self.colors['primary'])])
     
     def generate_demo_employees(self, num):
-        first_names = ['Alice', 'Bob', 'Charlie', 'Diana', 'Eve', 'Frank']
-        last_names = ['Nguyen', 'Patel', 'Rodriguez', 'Kim', 'Huang', 'Lee']
-        
-        for i in range(num):
-            name = f"{random.choice(first_names)} {random.choice(last_names)}"
-            emp_id = f"EMP{i+1:03d}"
-            self.employees.append(name)
-            self.employee_codes[name] = emp_id
-            
-            scores = {cat: random.randint(1, 5) for cat in self.categories}
-            if self.objective_details.empty:
-                self.objective_details = pd.DataFrame(scores, index=[name])
-            else:
-                self.objective_details.loc[name] = scores
+        cycle = generate_synthetic_org(num, self.categories, reviews_per_employee=0)
+        self.store.save_cycle(cycle)
+        self.apply_cycle(cycle)
+    
+    def load_cycle(self):
+        self.apply_cycle(self.store.load())
+    
+    def current_weighting(self):
+        if self.weighting_mode.get().startswith("Top-k neighbours"):
+            return 'topk'
+        if self.weighting_mode.get() == "Per-category, bias-corrected":
+            return 'category'
+        return super().current_weighting()
+    
+    def current_backend(self):
+        # The approximate option swaps the exact top-k search for MinHash LSH
+        if self.weighting_mode.get() == "Top-k neighbours (approximate)":
+            return 'lsh'
+        return 'auto'
+    
+    def current_k(self):
+        try:
+            return max(int(self.neighbour_count.get()), 1)
+        except (tk.TclError, ValueError):
+            return DEFAULT_NEIGHBOURS
+    
+    def flush_reviews(self):
+        self.flush_scheduled = False
+        self.store.flush()
+    
+    def sync_reviews(self):
+        # Pull reviews other clients submitted to the service since the last sync
+        for reviewers, reviewees, ratings in self.client.reviews_since(len(self.review_log)):
+            for reviewer, reviewee, review_ratings in zip(reviewers, reviewees, ratings):
+                self.record_review(reviewer, reviewee, review_ratings)
+    
+    def on_close(self):
+        if self.store is not None:
+            self.store.compact()
+            self.store.close()
+        self.root.destroy()
     
     def create_main_interface(self):
         # Main container
@@ -111,6 +173,7 @@ class EmployeeAppraisalSystem:
         # Create tabs
         self.create_review_tab()
         self.create_results_tab()
+        self.create_performance_tab()
         
         self.tab_control.pack(fill=tk.BOTH, expand=True)
     
@@ -128,7 +191,7 @@ class EmployeeAppraisalSystem:
         # Create combobox with proper configuration
         self.reviewer_combo = ttk.Combobox(
             controls_frame,
-            values=self.employees,
+            values=self.employee_labels(),
             state="readonly",
             height=10,
             font=('Helvetica', 10)
@@ -143,13 +206,16 @@ class EmployeeAppraisalSystem:
                   text="Start Review", 
                   command=self.start_review).pack(side=tk.LEFT)
         
-        # Review display area
+        # Review display area: a status message, or the review form, which
+        # is built once here and refilled for every reviewee
         self.review_display = ttk.Frame(review_tab)
         self.review_display.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Initial message
-        ttk.Label(self.review_display, 
-                 text="Select a reviewer to begin peer review").pack(pady=50)
+        self.review_message = ttk.Label(self.review_display, 
+                                        text="Select a reviewer to begin peer review")
+        self.review_message.pack(pady=50)
+        self.review_form = ReviewForm(self.review_display, self.categories,
+                                      self.submit_review, self.colors)
     
     def create_results_tab(self):
         # Results tab
@@ -160,317 +226,355 @@ class EmployeeAppraisalSystem:
         controls_frame = ttk.Frame(results_tab)
         controls_frame.pack(fill=tk.X, padx=10, pady=10)
         
-        ttk.Button(controls_frame, 
-                  text="Generate Results", 
-                  command=self.display_results).pack(pady=10)
+        ttk.Label(controls_frame, text="Peer Weighting:").pack(side=tk.LEFT)
+        self.weighting_mode = tk.StringVar(value="Full similarity")
+        ttk.Combobox(
+            controls_frame,
+            textvariable=self.weighting_mode,
+            values=["Full similarity", "Top-k neighbours (exact)", "Top-k neighbours (approximate)",
+                    "Per-category, bias-corrected"],
+            state="readonly",
+            width=28,
+            font=('Helvetica', 10)
+        ).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(controls_frame, text="k:", font=('Helvetica', 10)).pack(side=tk.LEFT)
+        self.neighbour_count = tk.StringVar(value=str(DEFAULT_NEIGHBOURS))
+        ttk.Spinbox(
+            controls_frame,
+            textvariable=self.neighbour_count,
+            from_=1,
+            to=100,
+            width=4,
+            font=('Helvetica', 10)
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self.generate_button = ttk.Button(controls_frame, 
+                                          text="Generate Results", 
+                                          command=self.display_results)
+        self.generate_button.pack(side=tk.LEFT, padx=10, pady=10)
+        
+        self.cancel_button = ttk.Button(controls_frame,
+                                        text="Cancel",
+                                        command=self.cancel_analysis,
+                                        state="disabled")
+        self.cancel_button.pack(side=tk.LEFT)
+        
+        self.progress = ttk.Progressbar(controls_frame, mode="indeterminate")
+        self.progress.pack(side=tk.LEFT, padx=10, fill=tk.X, expand=True)
+        
+        # Summary table on top, breakdown of the selected employee below
+        panes = ttk.PanedWindow(results_tab, orient=tk.VERTICAL)
+        panes.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        self.results_table = VirtualResultsTable(panes,
+                                                 details_provider=self.review_rows,
+                                                 on_select=self.show_employee_details)
+        panes.add(self.results_table, weight=3)
         
-        # Results display
         self.results_text = scrolledtext.ScrolledText(
-            results_tab,
+            panes,
             wrap=tk.WORD,
             width=100,
-            height=30,
+            height=12,
+            font=('Courier', 10),
+            bg='white',
+            fg=self.colors['text']
+        )
+        panes.add(self.results_text, weight=2)
+    
+    def create_performance_tab(self):
+        # Performance tab: instrumentation switches, collected metrics and the
+        # last analysis profile
+        performance_tab = ttk.Frame(self.tab_control)
+        self.tab_control.add(performance_tab, text="Performance")
+        
+        controls_frame = ttk.Frame(performance_tab)
+        controls_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        self.metrics_enabled = tk.BooleanVar(value=metrics.enabled)
+        ttk.Checkbutton(controls_frame,
+                        text="Collect timings",
+                        variable=self.metrics_enabled,
+                        command=self.toggle_instrumentation).pack(side=tk.LEFT)
+        self.profile_enabled = tk.BooleanVar(value=metrics.profile)
+        ttk.Checkbutton(controls_frame,
+                        text="Profile analysis (cProfile)",
+                        variable=self.profile_enabled,
+                        command=self.toggle_instrumentation).pack(side=tk.LEFT, padx=10)
+        ttk.Button(controls_frame, text="Refresh", command=self.refresh_performance).pack(side=tk.LEFT)
+        ttk.Button(controls_frame, text="Reset", command=self.reset_performance).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls_frame, text="Export...", command=self.export_performance).pack(side=tk.LEFT)
+        
+        self.performance_text = scrolledtext.ScrolledText(
+            performance_tab,
+            wrap=tk.NONE,
+            width=100,
+            height=20,
             font=('Courier', 10),
             bg='white',
             fg=self.colors['text']
         )
-        self.results_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.performance_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.refresh_performance()
+    
+    def toggle_instrumentation(self):
+        metrics.enabled = self.metrics_enabled.get()
+        metrics.profile = self.profile_enabled.get()
+    
+    def refresh_performance(self):
+        self.performance_text.delete(1.0, tk.END)
+        if not metrics.enabled:
+            self.performance_text.insert(tk.END, "Timing collection is off; tick \"Collect timings\" "
+                                                 "and generate results.\n\n")
+        self.performance_text.insert(tk.END, metrics.summary())
+        profile = metrics.profile_text()
+        if profile:
+            self.performance_text.insert(tk.END, "\n\nLast analysis profile (by cumulative time):\n")
+            self.performance_text.insert(tk.END, profile)
+    
+    def reset_performance(self):
+        metrics.reset()
+        self.refresh_performance()
+    
+    def export_performance(self):
+        path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Prometheus text", "*.prom")])
+        if path:
+            metrics.export(path)
     
     def start_review(self):
-        reviewer = self.reviewer_combo.get()
+        # The combobox lists employees by id, so its position is the employee id
+        reviewer = self.reviewer_combo.current()
         
         # Validate selection
-        if not reviewer or reviewer not in self.employees:
+        if reviewer < 0:
             messagebox.showerror("Error", "Please select a valid reviewer from the dropdown list")
             return
             
-        available = [e for e in self.employees if e != reviewer and (reviewer, e) not in self.reviewed_pairs]
-        if not available:
+        try:
+            if self.client:
+                reviewee = self.client.next_assignment(reviewer)
+            else:
+                reviewee = next_assignment(self.assignments, reviewer, len(self.employees), self.store.has_pair)
+        except (OSError, ValueError) as exc:
+            messagebox.showerror("Error", f"Could not reach the review service: {exc}")
+            return
+        if reviewee is None:
             messagebox.showinfo("Info", "No more employees available for this reviewer to review")
             return
-            
-        self.current_reviewee = random.choice(available)
+        self.current_reviewee = reviewee
         self.current_reviewer = reviewer
-        
-        # Clear previous review display
-        for widget in self.review_display.winfo_children():
-            widget.destroy()
-        
         self.setup_review_interface()
     
     def setup_review_interface(self):
-        # Create canvas and scrollbar
-        canvas = tk.Canvas(self.review_display, bg=self.colors['background'])
-        scrollbar = ttk.Scrollbar(self.review_display, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-        
-        # Configure scrollregion
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Add content to scrollable frame
-        ttk.Label(scrollable_frame, 
-                 text=f"Reviewer ID: {self.employee_codes[self.current_reviewer]}").pack(anchor="w")
-        ttk.Label(scrollable_frame, 
-                 text="Reviewing Employee: [Name and ID Hidden Until Results]").pack(anchor="w", pady=(0, 20))
-        
-        scores = self.objective_details.loc[self.current_reviewee]
-        self.rating_vars = {}
-        
-        for cat in self.categories:
-            frame = ttk.Frame(scrollable_frame)
-            frame.pack(fill=tk.X, padx=5, pady=5)
-            
-            ttk.Label(frame, text=f"{cat}:").pack(anchor="w")
-            desc = self._get_description(scores[cat], cat)
-            ttk.Label(frame, text=desc, wraplength=700).pack(anchor="w", padx=10)
-            
-            # Rating slider
-            slider_frame = ttk.Frame(frame)
-            slider_frame.pack(fill=tk.X, padx=10, pady=5)
-            
-            ttk.Label(slider_frame, text="1").pack(side="left")
-            var = tk.IntVar(value=3)
-            tk.Scale(slider_frame, from_=1, to=5, orient="horizontal",
-                    variable=var, bg=self.colors['panel']).pack(side="left", padx=5, fill=tk.X, expand=True)
-            ttk.Label(slider_frame, text="5").pack(side="left")
-            
-            self.rating_vars[cat] = var
-        
-        # Submit button
-        ttk.Button(scrollable_frame, 
-                  text="Submit Review", 
-                  command=self.submit_review).pack(pady=20)
+        scores = self.objective[self.current_reviewee].tolist()
+        self.review_form.load(self.employee_ids[self.current_reviewer],
+                              [self._get_description(score, cat) for cat, score in zip(self.categories, scores)])
+        self.review_message.pack_forget()
+        self.review_form.pack(fill=tk.BOTH, expand=True)
     
     def submit_review(self):
-        ratings = {cat: var.get() for cat, var in self.rating_vars.items()}
-        self.reviews[self.current_reviewee].append((self.current_reviewer, ratings))
-        self.reviewed_pairs.add((self.current_reviewer, self.current_reviewee))
-        
-        for widget in self.review_display.winfo_children():
-            widget.destroy()
+        ratings = self.review_form.ratings()
+        if self.client:
+            # The service checks the pair; the review comes back with the sync
+            try:
+                accepted = self.client.submit(self.current_reviewer, self.current_reviewee, ratings)
+                self.sync_reviews()
+            except (OSError, ValueError) as exc:
+                messagebox.showerror("Error", f"Could not submit the review: {exc}")
+                return
+            message = ("Review submitted successfully!" if accepted
+                       else "This employee has already been reviewed by this reviewer.")
+        else:
+            self.record_review(self.current_reviewer, self.current_reviewee, ratings)
+            self.store.add_review(self.current_reviewer, self.current_reviewee, ratings)
+            if self.store.pending and not self.flush_scheduled:
+                self.flush_scheduled = True
+                self.root.after(FLUSH_INTERVAL_MS, self.flush_reviews)
+            message = "Review submitted successfully!"
         
-        ttk.Label(self.review_display, text="Review submitted successfully!").pack(pady=50)
+        self.review_form.pack_forget()
+        self.review_message.configure(text=message)
+        self.review_message.pack(pady=50)
         
         # Refresh combobox
-        self.reviewer_combo['values'] = self.employees
         if self.employees:
             self.reviewer_combo.current(0)
     
     def display_results(self):
+        # Only one analysis at a time; the button is disabled while it runs
+        if self.analysis_thread is not None:
+            return
+        
         self.results_text.delete(1.0, tk.END)
-        scores = self.analyze_reviews()
+        self.analysis_started = time.perf_counter()
+        if self.client:
+            try:
+                self.sync_reviews()
+            except OSError as exc:
+                messagebox.showerror("Error", f"Could not fetch reviews from the review service: {exc}")
+                return
+        cancel = threading.Event()
+        with metrics.span("display.prepare"):
+            compute = self.prepare_analysis(backend=self.current_backend(), k=self.current_k(), cancel=cancel)
+        if compute is None:
+            self.show_results(None)
+            return
         
-        if not scores:
+        self.results_text.insert(tk.END, "Computing results...")
+        self.progress.start(10)
+        self.generate_button.state(['disabled'])
+        self.cancel_button.state(['!disabled'])
+        self.analysis_cancel = cancel
+        self.analysis_queue = queue.Queue()
+        self.analysis_thread = threading.Thread(
+            target=self.run_analysis,
+            args=(compute, cancel, self.analysis_queue),
+            daemon=True)
+        self.analysis_thread.start()
+        self.root.after(ANALYSIS_POLL_MS, self.poll_analysis, self.analysis_queue)
+    
+    def run_analysis(self, compute, cancel, messages):
+        # Runs on the worker thread: never touch Tk from here, only the queue.
+        # compute checks cancel between stages and batches and raises
+        # AnalysisCancelled; a cancelled run's queue is no longer polled
+        try:
+            messages.put(('done', metrics.profiled(compute)))
+        except AnalysisCancelled:
+            pass
+        except Exception as exc:
+            messages.put(('error', exc))
+    
+    def poll_analysis(self, messages):
+        # Each run polls its own queue; one cancelled or replaced stops here
+        if messages is not self.analysis_queue:
+            return
+        try:
+            kind, payload = messages.get_nowait()
+        except queue.Empty:
+            self.root.after(ANALYSIS_POLL_MS, self.poll_analysis, messages)
+            return
+        self.finish_analysis()
+        self.results_text.delete(1.0, tk.END)
+        if kind == 'done':
+            self.show_results(payload)
+            metrics.record("display.total", time.perf_counter() - self.analysis_started)
+            self.refresh_performance()
+        else:
+            messagebox.showerror("Error", f"Analysis failed: {payload}")
+    
+    def cancel_analysis(self):
+        # The worker stops at its next check; the window is free right away
+        if self.analysis_cancel is None:
+            return
+        self.analysis_cancel.set()
+        self.finish_analysis()
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, "Analysis cancelled.")
+    
+    def finish_analysis(self):
+        self.analysis_thread = None
+        self.analysis_cancel = None
+        self.analysis_queue = None
+        self.progress.stop()
+        self.generate_button.state(['!disabled'])
+        self.cancel_button.state(['disabled'])
+    
+    def show_results(self, result):
+        # Only the summary arrays go to the table; per-employee breakdowns are
+        # built on demand by review_rows and show_employee_details
+        self.results = result
+        if result is None or not len(result):
+            self.results_table.set_rows([], [], [], [], [])
             self.results_text.insert(tk.END, "No appraisal data available yet.")
             return
-            
+        
+        order = result.order
+        with metrics.span("display.table"):
+            self.results_table.set_rows([self.employee_ids[i] for i in order],
+                                        [self.employees[i] for i in order],
+                                        result.final_score[order], result.complete[order],
+                                        result.approved[order])
         self.results_text.insert(tk.END, "Final Appraisal Breakdown\n")
         self.results_text.insert(tk.END, "="*60 + "\n")
-        
-        for emp, details in scores.items():
-            self.format_employee_results(emp, details)
+        self.results_text.insert(tk.END, "Select an employee to see their full breakdown.\n")
+    
+    def review_rows(self, pos):
+        details = self.results.details(self.results.order[pos])
+        return [(self.employee_ids[reviewer], self.employees[reviewer], f"sim {sim:.3f}", f"avg {avg_rating:.2f}", "")
+                for reviewer, ratings, sim, avg_rating in details['reviewer_details']]
+    
+    def show_employee_details(self, pos):
+        emp_index = self.results.order[pos]
+        self.results_text.delete(1.0, tk.END)
+        with metrics.span("display.details"):
+            self.format_employee_results(emp_index, self.results.details(emp_index))
+    
+    def write_result(self, text):
+        self.results_text.insert(tk.END, text)
+        metrics.count("widget_operations")
     
     def format_employee_results(self, emp, details):
-        self.results_text.insert(tk.END, f"\nReviewee ID: {self.employee_codes[emp]}\n")
-        self.results_text.insert(tk.END, f"Reviewee Name: {emp}\n")
-        self.results_text.insert(tk.END, f"Status       : {details['status']}\n")
-        self.results_text.insert(tk.END, f"Verdict      : {details['verdict']}\n\n")
+        self.write_result(f"\nReviewee ID: {self.employee_ids[emp]}\n")
+        self.write_result(f"Reviewee Name: {self.employees[emp]}\n")
+        self.write_result(f"Status       : {details['status']}\n")
+        self.write_result(f"Verdict      : {details['verdict']}\n\n")
         
-        self.results_text.insert(tk.END, "Objective Scores:\n")
+        self.write_result("Objective Scores:\n")
         for cat, score in details['objective_scores'].items():
-            self.results_text.insert(tk.END, f"  {cat:<18}: {score}\n")
+            self.write_result(f"  {cat:<18}: {score}\n")
         
-        self.results_text.insert(tk.END, f"\nMean Objective Score     : {details['objective_mean']:.2f}\n\n")
-        self.results_text.insert(tk.END, "Peer Review Contributions:\n")
+        self.write_result(f"\nMean Objective Score     : {details['objective_mean']:.2f}\n\n")
+        self.write_result("Peer Review Contributions:\n")
         
         for review in details['reviewer_details']:
             self.format_review_details(review)
         
-        self.results_text.insert(tk.END, f"\nWeighted Peer Avg Score  : {details['weighted_peer_avg']:.2f}\n")
-        self.results_text.insert(tk.END, f"Final Score Calculation  : (0.7 * {details['objective_mean']:.2f} + 0.3 * {details['weighted_peer_avg']:.2f}) / 5\n")
-        self.results_text.insert(tk.END, f"Final Score (0-1)        : {details['final_score']:.2f}\n")
-        self.results_text.insert(tk.END, f"Threshold                : 0.70\n")
-        self.results_text.insert(tk.END, f"Verdict                 : {details['verdict']}\n")
-        self.results_text.insert(tk.END, "="*60 + "\n")
+        if 'category_peer_scores' in details:
+            self.write_result("\nBias-corrected Peer Scores:\n")
+            for cat, score in details['category_peer_scores'].items():
+                self.write_result(f"  {cat:<18}: {score:.2f}\n")
+        
+        self.write_result(f"\nWeighted Peer Avg Score  : {details['weighted_peer_avg']:.2f}\n")
+        self.write_result(f"Final Score Calculation  : (0.7 * {details['objective_mean']:.2f} + 0.3 * {details['weighted_peer_avg']:.2f}) / 5\n")
+        self.write_result(f"Final Score (0-1)        : {details['final_score']:.2f}\n")
+        self.write_result(f"Threshold                : 0.70\n")
+        self.write_result(f"Verdict                 : {details['verdict']}\n")
+        self.write_result("="*60 + "\n")
     
     def format_review_details(self, review):
         reviewer, ratings, sim, avg_rating = review
-        self.results_text.insert(tk.END, f"  Reviewer ID            : {self.employee_codes[reviewer]}\n")
-        self.results_text.insert(tk.END, f"  Reviewer Name          : {reviewer}\n")
-        self.results_text.insert(tk.END, f"  Similarity Score       : {sim:.3f}\n")
-        self.results_text.insert(tk.END, f"  Reviewer Avg Rating    : {avg_rating:.2f}\n")
-        self.results_text.insert(tk.END, "  Ratings by Category:\n")
+        self.write_result(f"  Reviewer ID            : {self.employee_ids[reviewer]}\n")
+        self.write_result(f"  Reviewer Name          : {self.employees[reviewer]}\n")
+        self.write_result(f"  Similarity Score       : {sim:.3f}\n")
+        self.write_result(f"  Reviewer Avg Rating    : {avg_rating:.2f}\n")
+        self.write_result("  Ratings by Category:\n")
         
         for cat, rating in ratings.items():
-            self.results_text.insert(tk.END, f"    {cat:<18}: {rating}\n")
+            self.write_result(f"    {cat:<18}: {rating}\n")
         
-        self.results_text.insert(tk.END, "-"*40 + "\n")
-    
-    def analyze_reviews(self):
-        if not self.reviews:
-            return {}
-            
-        if sklearn_available:
-            return self.analyze_with_sklearn()
-        else:
-            return self.analyze_without_sklearn()
-    
-    def analyze_with_sklearn(self):
-        matrix = self.build_user_item_matrix()
-        cosine_sim = cosine_similarity(matrix)
-        sim_df = pd.DataFrame(cosine_sim, index=self.employees, columns=self.employees)
-        
-        final_scores = {}
-        for emp in self.reviews.keys():
-            final_scores[emp] = self.calculate_employee_score(emp, sim_df)
-        
-        return final_scores
-    
-    def analyze_without_sklearn(self):
-        final_scores = {}
-        for emp in self.reviews.keys():
-            final_scores[emp] = self.simple_calculate_employee_score(emp)
-        
-        return final_scores
-    
-    def build_user_item_matrix(self):
-        matrix = pd.DataFrame(index=self.employees, columns=self.employees, dtype=float)
-        for reviewee in self.reviews:
-            for reviewer, rating in self.reviews[reviewee]:
-                avg_score = np.mean(list(rating.values()))
-                matrix.loc[reviewer, reviewee] = avg_score
-        return matrix.fillna(0)
-    
-    def calculate_employee_score(self, emp, sim_df):
-        obj_scores = self.objective_details.loc[emp]
-        obj_mean = obj_scores.mean()
-        peer_reviews = self.reviews.get(emp, [])
-        
-        weighted_peer_sum = 0.0
-        total_weight = 0.0
-        reviewer_details = []
-        
-        for reviewer, rating in peer_reviews:
-            avg_rating = np.mean(list(rating.values()))
-            similarity_row = sim_df.loc[reviewer]
-            similarity = similarity_row.drop(emp).mean() if emp in similarity_row else similarity_row.mean()
-            
-            weighted_peer_sum += avg_rating * similarity
-            total_weight += similarity
-            reviewer_details.append((reviewer, rating, similarity, avg_rating))
-        
-        weighted_peer_avg = weighted_peer_sum / total_weight if total_weight > 0 else 0.0
-        final_score = (0.7 * obj_mean + 0.3 * weighted_peer_avg) / 5.0
-        
-        status = "COMPLETE" if len(peer_reviews) >= 3 else "PENDING"
-        verdict = "APPROVED" if final_score >= 0.7 else "REJECTED"
-        
-        return {
-            'final_score': final_score,
-            'objective_scores': obj_scores.to_dict(),
-            'objective_mean': obj_mean,
-            'reviewer_details': reviewer_details,
-            'weighted_peer_avg': weighted_peer_avg,
-            'status': status,
-            'verdict': verdict
-        }
-    
-    def simple_calculate_employee_score(self, emp):
-        obj_scores = self.objective_details.loc[emp]
-        obj_mean = obj_scores.mean()
-        peer_reviews = self.reviews.get(emp, [])
-        
-        peer_avg = np.mean([np.mean(list(rating.values())) for _, rating in peer_reviews]) if peer_reviews else 0.0
-        final_score = (0.7 * obj_mean + 0.3 * peer_avg) / 5.0
-        
-        status = "COMPLETE" if len(peer_reviews) >= 3 else "PENDING"
-        verdict = "APPROVED" if final_score >= 0.7 else "REJECTED"
-        
-        reviewer_details = [
-            (reviewer, rating, 0.0, np.mean(list(rating.values()))) 
-            for reviewer, rating in peer_reviews
-        ]
-        
-        return {
-            'final_score': final_score,
-            'objective_scores': obj_scores.to_dict(),
-            'objective_mean': obj_mean,
-            'reviewer_details': reviewer_details,
-            'weighted_peer_avg': peer_avg,
-            'status': status,
-            'verdict': verdict
-        }
+        self.write_result("-"*40 + "\n")
     
     def _get_description(self, score, category):
-        descriptions = {
-            'Productivity': [
-                "Frequently misses deadlines and needs constant supervision.",
-                "Delivers some tasks but misses project timelines often.",
-                "Meets basic project expectations and completes work on time.",
-                "Proactively completes tasks, often ahead of schedule.",
-                "Delivers exceptional work with efficiency and self-discipline."
-            ],
-            'Teamwork': [
-                "Rarely collaborates and struggles in team environments.",
-                "Inconsistent in collaboration or communicating ideas.",
-                "Participates in team discussions and shares responsibilities.",
-                "Supports teammates proactively and shares credit.",
-                "Acts as a role model in collaboration and encourages others."
-            ],
-            'Innovation': [
-                "Lacks new ideas and sticks to routine solutions.",
-                "Struggles to think creatively or suggest improvements.",
-                "Contributes some practical ideas occasionally.",
-                "Proposes relevant optimizations and automation opportunities.",
-                "Leads innovation with new feature ideas and process changes."
-            ],
-            'Communication': [
-                "Struggles to convey ideas and causes confusion in teams.",
-                "Often unclear in written or verbal updates.",
-                "Communicates adequately with clients and teammates.",
-                "Explains ideas clearly and keeps stakeholders informed.",
-                "Ensures clarity in meetings, emails, and client interactions."
-            ],
-            'Leadership': [
-                "Avoids taking initiative or leading discussions.",
-                "Rarely steps up or volunteers for responsibilities.",
-                "Manages tasks when assigned and delegates decently.",
-                "Guides peers during sprints and provides mentorship.",
-                "Inspires others and manages complex situations gracefully."
-            ],
-            'Problem Solving': [
-                "Needs support to resolve even minor bugs or blockers.",
-                "Takes too long to identify or resolve issues.",
-                "Can independently resolve moderate technical problems.",
-                "Efficient in debugging and architectural analysis.",
-                "Resolves issues others struggle with, often preventing them early."
-            ],
-            'Adaptability': [
-                "Struggles to adjust to changing project requirements.",
-                "Takes longer to adapt to new tools or workflows.",
-                "Adapts decently under deadline pressures.",
-                "Quickly adopts tech stacks and agile changes.",
-                "Thrives in changing environments and adopts new practices rapidly."
-            ],
-            'Quality of Work': [
-                "Code or documentation often lacks testing and clarity.",
-                "Makes errors requiring frequent reviews or rollbacks.",
-                "Produces work that passes reviews with minor revisions.",
-                "Delivers maintainable, well-tested modules.",
-                "Delivers polished, scalable, and reliable software consistently."
-            ]
-        }
-        return descriptions[category][score - 1]
+        return self.rubric[category][score - 1]
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Employee Appraisal System")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH,
+                        help="SQLite file holding the appraisal cycle")
+    parser.add_argument("--objective", help="CSV/Parquet of objective scores; starts a new cycle")
+    parser.add_argument("--reviews", help="CSV/Parquet of peer reviews to import with --objective")
+    parser.add_argument("--server", help="URL of a running review_service.py to use instead of --store")
+    args = parser.parse_args()
+    if args.reviews and not args.objective:
+        parser.error("--reviews requires --objective")
+    if args.server and args.objective:
+        parser.error("--server and --objective cannot be combined")
+    
     root = tk.Tk()
-    app = EmployeeAppraisalSystem(root)
+    import_paths = (args.objective, args.reviews) if args.objective else None
+    app = EmployeeAppraisalSystem(root, store_path=args.store, import_paths=import_paths,
+                                  server_url=args.server)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""Appraisal history across cycles, stored as partitioned Parquet.
+
+Each recorded cycle adds one hive partition (``cycle=<id>``) to three
+datasets under the history directory:
+
+    scores/     employee_id, name, objective_mean, weighted_peer_avg,
+                final_score, reviews, complete, approved
+    objective/  employee_id and one uint8 column per category
+    reviews/    reviewer_id, reviewee_id, weight and one uint8 column per category
+
+``scores`` holds the per-employee outputs of the scoring run, the same
+fields ``calculate_employee_score`` reports. Queries read only the columns
+they need through pyarrow.dataset, with cycle and employee filters pushed
+down to partition and row-group pruning, and pivot the result into
+(employee x cycle) NumPy arrays instead of going through pandas.
+
+    python history_store.py history/ cycles
+    python history_store.py history/ movers --top 20
+"""
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+
+import numpy as np
+
+from scoring_engine import APPROVAL_THRESHOLD
+
+# pyarrow is optional and imported on first use
+pyarrow_available = importlib.util.find_spec("pyarrow") is not None
+
+DATASETS = ('scores', 'objective', 'reviews')
+SORT_KEYS = ('employee_id', 'employee_id', 'reviewee_id')
+MANIFEST = "cycles.json"
+# Rows are sorted by employee within each file, so row-group statistics let
+# employee filters skip most of a partition
+ROW_GROUP_SIZE = 65536
+
+
+class HistoryStore:
+    def __init__(self, path):
+        if not pyarrow_available:
+            raise RuntimeError("the appraisal history requires pyarrow")
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        manifest = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                self.cycle_ids = json.load(f)['cycles']
+        else:
+            self.cycle_ids = []
+
+    def cycles(self):
+        """Recorded cycle ids, oldest first."""
+        return list(self.cycle_ids)
+
+    def _save_manifest(self):
+        staging = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(staging, "w") as f:
+            json.dump({'cycles': self.cycle_ids}, f)
+        os.replace(staging, os.path.join(self.path, MANIFEST))
+
+    def _partition(self, dataset, cycle_id):
+        return os.path.join(self.path, dataset, f"cycle={cycle_id}")
+
+    def record_cycle(self, cycle_id, core, result):
+        """Store ``core``'s cycle and its ScoreResult as ``cycle_id``, replacing an earlier copy."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        cycle_id = str(cycle_id)
+        if not cycle_id or "/" in cycle_id or os.sep in cycle_id:
+            raise ValueError(f"invalid cycle id: {cycle_id!r}")
+        codes = np.asarray(core.employee_ids, dtype=object)
+        order = result.order
+        scores = pa.table({
+            'employee_id': pa.array(codes[order], type=pa.string()),
+            'name': pa.array(np.asarray(core.employees, dtype=object)[order], type=pa.string()),
+            'objective_mean': result.objective_mean[order],
+            'weighted_peer_avg': result.weighted_peer_avg[order],
+            'final_score': result.final_score[order],
+            'reviews': result.review_count[order].astype(np.int32),
+            'complete': result.complete[order],
+            'approved': result.approved[order]
+        })
+        objective = np.asarray(core.objective, dtype=np.uint8)
+        objective_table = pa.table(dict(
+            [('employee_id', pa.array(codes, type=pa.string()))]
+            + [(cat, objective[:, j]) for j, cat in enumerate(core.categories)]))
+        reviews = result.engine.reviews
+        ratings = np.asarray(reviews.ratings, dtype=np.uint8)
+        reviews_table = pa.table(dict(
+            [('reviewer_id', pa.array(codes[reviews.reviewer_idx], type=pa.string())),
+             ('reviewee_id', pa.array(codes[reviews.reviewee_idx], type=pa.string())),
+             ('weight', np.asarray(result.review_weight, dtype=np.float64))]
+            + [(cat, ratings[:, j]) for j, cat in enumerate(core.categories)]))
+
+        for dataset, key, table in zip(DATASETS, SORT_KEYS, (scores, objective_table, reviews_table)):
+            partition = self._partition(dataset, cycle_id)
+            shutil.rmtree(partition, ignore_errors=True)
+            os.makedirs(partition)
+            pq.write_table(table.sort_by(key), os.path.join(partition, "part-0.parquet"),
+                           row_group_size=ROW_GROUP_SIZE)
+
+        if cycle_id not in self.cycle_ids:
+            self.cycle_ids.append(cycle_id)
+            self._save_manifest()
+
+    def _read(self, dataset, columns, cycles=None, employee_ids=None, id_column='employee_id'):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if not self.cycle_ids:
+            raise ValueError(f"{self.path}: no cycles recorded yet")
+        cycles = self.cycles() if cycles is None else [str(c) for c in cycles]
+        unknown = set(cycles) - set(self.cycle_ids)
+        if unknown:
+            raise ValueError(f"unknown cycles: {sorted(unknown)}")
+        partitioning = ds.partitioning(pa.schema([('cycle', pa.string())]), flavor="hive")
+        data = ds.dataset(os.path.join(self.path, dataset), format="parquet", partitioning=partitioning)
+        condition = ds.field('cycle').isin(cycles)
+        if employee_ids is not None:
+            condition = condition & ds.field(id_column).isin(list(employee_ids))
+        return data.to_table(columns=list(columns) + ['cycle'], filter=condition), cycles
+
+    @staticmethod
+    def _axes(table, id_column, cycles, employee_ids):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if employee_ids is None:
+            codes = np.sort(pc.unique(table[id_column]).to_numpy(zero_copy_only=False).astype(object))
+        else:
+            codes = np.asarray(list(employee_ids), dtype=object)
+        row = pc.index_in(table[id_column], value_set=pa.array(codes, type=pa.string())).to_numpy(zero_copy_only=False)
+        col = pc.index_in(table['cycle'], value_set=pa.array(cycles, type=pa.string())).to_numpy(zero_copy_only=False)
+        return codes, row.astype(np.int64), col.astype(np.int64)
+
+    def trend(self, column='final_score', employee_ids=None, cycles=None):
+        """Per-employee trend lines: (codes, cycles, values[employee, cycle]), NaN where absent."""
+        table, cycles = self._read('scores', ['employee_id', column], cycles, employee_ids)
+        codes, row, col = self._axes(table, 'employee_id', cycles, employee_ids)
+        values = np.full((len(codes), len(cycles)), np.nan)
+        values[row, col] = table[column].to_numpy(zero_copy_only=False)
+        return codes, cycles, values
+
+    def deltas(self, column='final_score', employee_ids=None, cycles=None):
+        """Cycle-over-cycle changes: (codes, cycles, values[employee, cycle - 1])."""
+        codes, cycles, values = self.trend(column, employee_ids, cycles)
+        return codes, cycles, np.diff(values, axis=1)
+
+    def verdict_changes(self, employee_ids=None, cycles=None, threshold=APPROVAL_THRESHOLD):
+        """(codes, cycles, change[employee, cycle - 1]): +1 newly approved, -1 newly rejected."""
+        codes, cycles, values = self.trend('final_score', employee_ids, cycles)
+        approved = np.where(np.isnan(values), np.nan, values >= threshold)
+        return codes, cycles, np.diff(approved, axis=1)
+
+    def category_trajectories(self, categories, source='objective', employee_ids=None, cycles=None):
+        """Per-category scores over time: (codes, cycles, values[employee, cycle, category]).
+
+        ``source`` is 'objective' for the objective scores or 'peer' for the
+        mean peer rating each employee received in the cycle.
+        """
+        categories = list(categories)
+        if source == 'objective':
+            table, cycles = self._read('objective', ['employee_id'] + categories, cycles, employee_ids)
+            codes, row, col = self._axes(table, 'employee_id', cycles, employee_ids)
+            values = np.full((len(codes), len(cycles), len(categories)), np.nan)
+            for j, cat in enumerate(categories):
+                values[row, col, j] = table[cat].to_numpy(zero_copy_only=False)
+            return codes, cycles, values
+        if source != 'peer':
+            raise ValueError(f"Unknown trajectory source: {source}")
+
+        table, cycles = self._read('reviews', ['reviewee_id'] + categories, cycles, employee_ids,
+                                   id_column='reviewee_id')
+        codes, row, col = self._axes(table, 'reviewee_id', cycles, employee_ids)
+        cells = len(codes) * len(cycles)
+        key = row * len(cycles) + col
+        count = np.bincount(key, minlength=cells)
+        values = np.full((cells, len(categories)), np.nan)
+        reviewed = count > 0
+        for j, cat in enumerate(categories):
+            total = np.bincount(key, weights=table[cat].to_numpy(zero_copy_only=False), minlength=cells)
+            values[reviewed, j] = total[reviewed] / count[reviewed]
+        return codes, cycles, values.reshape(len(codes), len(cycles), len(categories))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the appraisal history")
+    parser.add_argument("path", help="history directory written by appraisal_cli.py --history")
+    parser.add_argument("query", choices=['cycles', 'trend', 'movers'])
+    parser.add_argument("--employees", nargs="+", help="EMP codes to include")
+    parser.add_argument("--column", default='final_score')
+    parser.add_argument("--top", type=int, default=10, help="movers: how many to list each way")
+    args = parser.parse_args(argv)
+
+    history = HistoryStore(args.path)
+    if args.query == 'cycles':
+        print("\n".join(history.cycles()))
+        return
+    if args.query == 'trend':
+        codes, cycles, values = history.trend(args.column, args.employees)
+        print("employee_id," + ",".join(cycles))
+        for code, line in zip(codes, values):
+            print(code + "," + ",".join("" if np.isnan(v) else f"{v:.4f}" for v in line))
+        return
+
+    # Biggest changes between the last two cycles
+    cycles = history.cycles()[-2:]
+    if len(cycles) < 2:
+        raise SystemExit("movers needs at least two recorded cycles")
+    codes, cycles, delta = history.deltas(args.column, args.employees, cycles)
+    delta = delta[:, 0]
+    known = np.flatnonzero(~np.isnan(delta))
+    ranked = known[np.argsort(delta[known], kind="stable")]
+    print(f"{args.column} change {cycles[0]} -> {cycles[1]}")
+    for label, picks in (("Most improved", ranked[::-1][:args.top]), ("Largest drops", ranked[:args.top])):
+        print(f"\n{label}:")
+        for i in picks:
+            print(f"  {codes[i]:<12} {delta[i]:+.4f}")
+
+
+if __name__ == "__main__":
+    main()
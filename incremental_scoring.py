@@ -0,0 +1,299 @@
+"""Incremental cosine-weighted scoring, updated on every submitted review.
+
+A new review (r, e) changes one entry of the user-item matrix. That moves
+reviewer r's norm, r's dot products with the other reviewers of e, and
+therefore only the similarity row sums of r and r's co-reviewers. Only the
+reviews written by those reviewers get new weights, so each update costs time
+proportional to r's neighbourhood in the review graph, not to the whole org.
+
+The starting state is seeded in bulk from the review log: with scipy the
+norms and dot products come from one CSR U·Uᵀ product and the weights from
+the vectorized sparse terms. The per-reviewer dicts and lists are only built
+from those CSR arrays when an update first touches them, so seeding costs
+about as much as one sparse recompute. Without scipy every review is
+replayed through ``add_review``'s update.
+
+    python incremental_scoring.py --employees 100000 --updates 2000
+"""
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+from scoring_engine import (ReviewArrays, ScoreResult, ScoringEngine, OBJECTIVE_WEIGHT,
+                            PEER_WEIGHT, MAX_RATING, APPROVAL_THRESHOLD)
+from sparse_similarity import (build_sparse_user_item_matrix, normalize_rows, pairwise_similarity,
+                               scipy_available, similarity_row_sums)
+
+
+class IncrementalScorer:
+    """Keeps norms, pairwise dot products and per-employee weighted sums current."""
+
+    def __init__(self, employees, categories, objective, capacity=1024):
+        self.employees = list(employees)
+        self.categories = list(categories)
+        self.objective = np.asarray(objective)
+        n = len(self.employees)
+        self.objective_mean = self.objective.mean(axis=1)
+
+        # User-item matrix kept both row-wise and column-wise
+        self.rows = [dict() for _ in range(n)]
+        self.columns = [dict() for _ in range(n)]
+        self.norm_sq = np.zeros(n)
+        self.dots = [dict() for _ in range(n)]
+        self.row_sum = np.zeros(n)
+
+        # Per-employee sums of avg * g and g, where g = row_sum[reviewer] - sim[reviewer, reviewee]
+        self.weighted_sum = np.zeros(n)
+        self.total_weight = np.zeros(n)
+        self.review_count = np.zeros(n, dtype=np.int64)
+        self.order = []
+
+        # Growable flat review arrays; g is the un-normalized weight of each review
+        self.n_reviews = 0
+        self.reviewer_idx = np.zeros(capacity, dtype=np.int32)
+        self.reviewee_idx = np.zeros(capacity, dtype=np.int32)
+        self.ratings = np.zeros((capacity, len(self.categories)), dtype=np.uint8)
+        self.review_avg = np.zeros(capacity)
+        self.g = np.zeros(capacity)
+        self.by_reviewer = [[] for _ in range(n)]
+        self.by_reviewee = [[] for _ in range(n)]
+
+    @classmethod
+    def from_app(cls, app):
+        reviews = app.review_log.arrays()
+        scorer = cls(app.employees, app.categories, app.objective, capacity=max(2 * len(reviews), 1024))
+        if scipy_available:
+            scorer._seed(reviews)
+        else:
+            for reviewer, reviewee, ratings in zip(reviews.reviewer_idx.tolist(), reviews.reviewee_idx.tolist(),
+                                                   reviews.ratings.tolist()):
+                scorer._insert(reviewer, reviewee, ratings)
+            scorer.rebuild()
+        return scorer
+
+    def _seed(self, reviews):
+        # Bulk equivalent of _insert for every review followed by rebuild()
+        n = len(self.employees)
+        m = len(reviews)
+        rv = reviews.reviewer_idx.astype(np.int64)
+        re = reviews.reviewee_idx.astype(np.int64)
+        self.n_reviews = m
+        self.reviewer_idx[:m] = rv
+        self.reviewee_idx[:m] = re
+        self.ratings[:m] = reviews.ratings
+        self.review_avg[:m] = reviews.review_means()
+        self.by_reviewer = LazyRows(n, group_positions(rv, n))
+        self.by_reviewee = LazyRows(n, group_positions(re, n))
+        self.review_count = np.bincount(re, minlength=n)
+        _, first = np.unique(re, return_index=True)
+        self.order = re[np.sort(first)].tolist()
+
+        matrix = build_sparse_user_item_matrix(n, reviews)
+        self.rows = LazyRows(n, csr_row_dict(matrix))
+        self.columns = LazyRows(n, csr_row_dict(matrix.T.tocsr()))
+        self.norm_sq = np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+        self.dots = LazyRows(n, csr_row_dict((matrix @ matrix.T).tocsr(), skip_diagonal=True))
+
+        unit = normalize_rows(matrix)
+        self.row_sum = similarity_row_sums(unit)
+        g = self.row_sum[rv] - pairwise_similarity(unit, rv, re)
+        self.g[:m] = g
+        self.weighted_sum = np.bincount(re, weights=self.review_avg[:m] * g, minlength=n)
+        self.total_weight = np.bincount(re, weights=g, minlength=n)
+
+    def similarity(self, a, b):
+        if a == b:
+            return 1.0 if self.norm_sq[a] > 0 else 0.0
+        dot = self.dots[a].get(b)
+        if not dot:
+            return 0.0
+        return dot / math.sqrt(self.norm_sq[a] * self.norm_sq[b])
+
+    def _grow(self):
+        capacity = 2 * len(self.reviewer_idx)
+        for name in ('reviewer_idx', 'reviewee_idx', 'review_avg', 'g'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        ratings = np.zeros((capacity, self.ratings.shape[1]), dtype=self.ratings.dtype)
+        ratings[:len(self.ratings)] = self.ratings
+        self.ratings = ratings
+
+    def add_review(self, reviewer, reviewee, ratings):
+        # reviewer and reviewee are employee ids, ratings are in category order
+        r = self._insert(reviewer, reviewee, ratings)
+        affected = [r] + list(self.dots[r])
+        self._refresh_row_sums(affected)
+        self._refresh_weights(affected)
+
+    def rebuild(self):
+        # Recompute every row sum and weight from the stored matrix, used after
+        # bulk loading and to clear any accumulated rounding
+        everyone = range(len(self.employees))
+        self._refresh_row_sums(everyone)
+        self._refresh_weights(everyone)
+
+    def _insert(self, reviewer, reviewee, ratings):
+        r, e = int(reviewer), int(reviewee)
+        values = list(ratings)
+        avg = np.mean(values)
+
+        if self.n_reviews == len(self.reviewer_idx):
+            self._grow()
+        k = self.n_reviews
+        self.n_reviews += 1
+        self.reviewer_idx[k] = r
+        self.reviewee_idx[k] = e
+        self.ratings[k] = values
+        self.review_avg[k] = avg
+        self.g[k] = 0.0
+        self.by_reviewer[r].append(k)
+        self.by_reviewee[e].append(k)
+        if self.review_count[e] == 0:
+            self.order.append(e)
+        self.review_count[e] += 1
+
+        # Update the matrix entry (the latest review of a pair wins), r's norm
+        # and r's dot products with everyone else who reviewed e
+        old = self.rows[r].get(e, 0.0)
+        delta = avg - old
+        self.rows[r][e] = avg
+        self.columns[e][r] = avg
+        self.norm_sq[r] += avg * avg - old * old
+        for j, value in self.columns[e].items():
+            if j != r:
+                dot = self.dots[r].get(j, 0.0) + delta * value
+                self.dots[r][j] = dot
+                self.dots[j][r] = dot
+        return r
+
+    def _refresh_row_sums(self, reviewers):
+        for a in reviewers:
+            self.row_sum[a] = sum(self.similarity(a, j) for j in self.dots[a]) + self.similarity(a, a)
+
+    def _refresh_weights(self, reviewers):
+        touched = set()
+        for a in reviewers:
+            for k in self.by_reviewer[a]:
+                self.g[k] = self.row_sum[a] - self.similarity(a, self.reviewee_idx[k])
+                touched.add(self.reviewee_idx[k])
+        for e in touched:
+            positions = self.by_reviewee[e]
+            self.weighted_sum[e] = sum(self.review_avg[k] * self.g[k] for k in positions)
+            self.total_weight[e] = sum(self.g[k] for k in positions)
+
+    def result(self):
+        """Current scores as a ScoreResult, without recomputing similarities."""
+        n = len(self.employees)
+        m = self.n_reviews
+        weighted_peer_avg = np.divide(self.weighted_sum, self.total_weight,
+                                      out=np.zeros(n), where=self.total_weight > 0)
+        final_score = (OBJECTIVE_WEIGHT * self.objective_mean + PEER_WEIGHT * weighted_peer_avg) / MAX_RATING
+        reviews = ReviewArrays(self.reviewer_idx[:m], self.reviewee_idx[:m], self.ratings[:m])
+        engine = ScoringEngine(self.employees, self.categories, self.objective, reviews)
+        return ScoreResult(engine, np.array(self.order, dtype=np.int64), self.objective_mean,
+                           weighted_peer_avg, final_score, self.review_count.copy(),
+                           self.g[:m] / max(n - 1, 1), self.review_avg[:m].copy())
+
+    def check_consistency(self, tol=1e-9):
+        """Compare the maintained state with a full recompute; returns the problems found."""
+        current = self.result()
+        full = current.engine.score('cosine')
+        problems = []
+        if not np.array_equal(current.order, full.order):
+            problems.append("employee order differs")
+        for name in ('review_weight', 'weighted_peer_avg', 'final_score'):
+            error = np.max(np.abs(getattr(current, name) - getattr(full, name)), initial=0.0)
+            if error > tol:
+                problems.append(f"{name} off by {error:.3g}")
+        # A score within tol of the threshold may land on either side of it
+        flipped = (current.approved != full.approved) & (np.abs(full.final_score - APPROVAL_THRESHOLD) > tol)
+        if flipped.any():
+            problems.append(f"{int(flipped.sum())} verdicts differ")
+        return problems
+
+
+class LazyRows:
+    """A list of per-employee containers, each built by ``build(i)`` on first access."""
+
+    def __init__(self, n, build):
+        self.n = n
+        self.build = build
+        self.built = {}
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        i = int(i)
+        row = self.built.get(i)
+        if row is None:
+            row = self.built[i] = self.build(i)
+        return row
+
+
+def group_positions(keys, n):
+    # Builder for the list of positions holding id i, in order
+    order = np.argsort(keys, kind="stable")
+    bounds = np.searchsorted(keys[order], np.arange(n + 1))
+    return lambda i: order[bounds[i]:bounds[i + 1]].tolist()
+
+
+def csr_row_dict(matrix, skip_diagonal=False):
+    # Builder for row i of a CSR matrix as a {column: value} dict
+    def build(i):
+        start, stop = matrix.indptr[i], matrix.indptr[i + 1]
+        row = dict(zip(matrix.indices[start:stop].tolist(), matrix.data[start:stop].tolist()))
+        if skip_diagonal:
+            row.pop(i, None)
+        return row
+    return build
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Seed the incremental scorer on a random org, apply updates and check it against a recompute")
+    parser.add_argument("--employees", type=int, default=20000)
+    parser.add_argument("--reviews-per-employee", type=int, default=5)
+    parser.add_argument("--updates", type=int, default=1000, help="reviews added after seeding")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from appraisal_core import AppraisalCore, CATEGORIES
+    from ingest import generate_synthetic_org
+
+    core = AppraisalCore()
+    core.apply_cycle(generate_synthetic_org(args.employees, CATEGORIES, args.reviews_per_employee, seed=args.seed))
+    n = len(core.employees)
+    start = time.perf_counter()
+    core.incremental_scorer = IncrementalScorer.from_app(core)
+    print(f"seeded {len(core.review_log)} reviews of {n} employees in {time.perf_counter() - start:.2f}s")
+
+    # New pairs, plus re-reviews of pairs already in the log (the later one wins)
+    rng = np.random.default_rng(args.seed + 1)
+    log = core.review_log.arrays()
+    start = time.perf_counter()
+    for i in range(args.updates):
+        if i % 4 == 3:
+            k = int(rng.integers(len(log)))
+            reviewer, reviewee = int(log.reviewer_idx[k]), int(log.reviewee_idx[k])
+        else:
+            reviewer = int(rng.integers(n))
+            reviewee = (reviewer + int(rng.integers(1, n))) % n
+        core.record_review(reviewer, reviewee, rng.integers(1, 6, len(core.categories)).tolist())
+    elapsed = time.perf_counter() - start
+    print(f"{args.updates} updates, {args.updates // 4} of them re-reviews, "
+          f"{elapsed / max(args.updates, 1) * 1000:.3f} ms each")
+
+    problems = core.incremental_scorer.check_consistency()
+    print("consistent with a full recompute" if not problems else "; ".join(problems))
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Chunked bulk import of objective scores and peer reviews.
+
+CSV and Parquet files are streamed in chunks, validated against the
+appraisal categories and the 1-5 rating scale, and assembled into arrays
+with a single allocation at the end. ``generate_synthetic_org`` builds
+orgs of any size (1M employees in seconds) for demos and load testing.
+
+Objective score files need ``employee_id``, ``name`` and one column per
+category; review files need ``reviewer_id``, ``reviewee_id`` and one column
+per category. Ids are the ``EMP`` codes shown in the GUI.
+"""
+import importlib.util
+import os
+
+import numpy as np
+
+from review_store import AppraisalCycle
+from scoring_engine import ReviewArrays
+
+# pandas and pyarrow are imported on first use to keep startup fast
+pyarrow_available = importlib.util.find_spec("pyarrow") is not None
+
+DEFAULT_CHUNKSIZE = 100_000
+FIRST_NAMES = ['Alice', 'Bob', 'Charlie', 'Diana', 'Eve', 'Frank']
+LAST_NAMES = ['Nguyen', 'Patel', 'Rodriguez', 'Kim', 'Huang', 'Lee']
+
+
+def iter_chunks(path, columns, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrames of at most ``chunksize`` rows holding ``columns``."""
+    import pandas as pd
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        if not pyarrow_available:
+            raise RuntimeError("reading Parquet files requires pyarrow")
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        missing = [c for c in columns if c not in parquet.schema_arrow.names]
+        if missing:
+            raise ValueError(f"{path}: missing columns {missing}")
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+    header = pd.read_csv(path, nrows=0).columns
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def validate_ratings(chunk, categories, first_row, path):
+    values = chunk[categories].to_numpy()
+    bad = ~np.isin(values, np.arange(1, 6))
+    if bad.any():
+        row = first_row + int(np.flatnonzero(bad.any(axis=1))[0]) + 1
+        raise ValueError(f"{path} row {row}: ratings must be whole numbers from 1 to 5")
+    return values.astype(np.uint8)
+
+
+def read_objective_scores(path, categories, chunksize=DEFAULT_CHUNKSIZE):
+    """Return (codes, names, objective) with objective as a uint8 (n, n_categories) array."""
+    import pandas as pd
+    codes, names, scores = [], [], []
+    first_row = 0
+    for chunk in iter_chunks(path, ['employee_id', 'name'] + list(categories), chunksize):
+        scores.append(validate_ratings(chunk, categories, first_row, path))
+        codes.append(chunk['employee_id'].astype(str).to_numpy())
+        names.append(chunk['name'].astype(str).to_numpy())
+        first_row += len(chunk)
+
+    codes = np.concatenate(codes) if codes else np.empty(0, dtype=object)
+    names = np.concatenate(names) if names else np.empty(0, dtype=object)
+    objective = np.concatenate(scores) if scores else np.empty((0, len(categories)), dtype=np.uint8)
+    duplicated = pd.Index(codes).duplicated()
+    if duplicated.any():
+        raise ValueError(f"{path}: duplicate employee_id {codes[duplicated][0]}")
+    return codes.tolist(), names.tolist(), objective
+
+
+def read_reviews(path, codes, categories, chunksize=DEFAULT_CHUNKSIZE):
+    """Return the reviews in ``path`` as ReviewArrays indexed like ``codes``."""
+    import pandas as pd
+    index = pd.Index(codes)
+    reviewers, reviewees, ratings = [], [], []
+    first_row = 0
+    for chunk in iter_chunks(path, ['reviewer_id', 'reviewee_id'] + list(categories), chunksize):
+        reviewer = index.get_indexer(chunk['reviewer_id'].astype(str))
+        reviewee = index.get_indexer(chunk['reviewee_id'].astype(str))
+        unknown = (reviewer < 0) | (reviewee < 0)
+        if unknown.any():
+            row = first_row + int(np.flatnonzero(unknown)[0]) + 1
+            raise ValueError(f"{path} row {row}: unknown employee id")
+        if (reviewer == reviewee).any():
+            row = first_row + int(np.flatnonzero(reviewer == reviewee)[0]) + 1
+            raise ValueError(f"{path} row {row}: employees cannot review themselves")
+        ratings.append(validate_ratings(chunk, categories, first_row, path))
+        reviewers.append(reviewer.astype(np.int32))
+        reviewees.append(reviewee.astype(np.int32))
+        first_row += len(chunk)
+
+    if not ratings:
+        return ReviewArrays(np.empty(0), np.empty(0), np.empty((0, len(categories)), dtype=np.uint8))
+    reviews = ReviewArrays(np.concatenate(reviewers), np.concatenate(reviewees), np.concatenate(ratings))
+    keys = reviews.reviewer_idx.astype(np.int64) * len(codes) + reviews.reviewee_idx
+    if len(np.unique(keys)) != len(keys):
+        raise ValueError(f"{path}: the same reviewer reviews an employee more than once")
+    return reviews
+
+
+def load_org(objective_path, reviews_path, categories, chunksize=DEFAULT_CHUNKSIZE):
+    codes, names, objective = read_objective_scores(objective_path, categories, chunksize)
+    if reviews_path:
+        reviews = read_reviews(reviews_path, codes, categories, chunksize)
+    else:
+        reviews = ReviewArrays(np.empty(0), np.empty(0), np.empty((0, len(categories)), dtype=np.uint8))
+    return AppraisalCycle(names, codes, list(categories), objective, reviews)
+
+
+def ring_reviews(rng, members, reviews_per_employee):
+    """(reviewer, reviewee) arrays where every member reviews others in ``members``."""
+    # Each reviewer takes a run of consecutive seats after a random offset on a
+    # shuffled ring, so nobody reviews themselves or the same person twice
+    n = len(members)
+    k = min(reviews_per_employee, n - 1)
+    seat = rng.permutation(n)
+    position = np.empty(n, dtype=np.int64)
+    position[seat] = np.arange(n)
+    start = rng.integers(1, n - k + 1, n) if k > 0 else np.zeros(n, dtype=np.int64)
+    reviewer = np.repeat(np.arange(n, dtype=np.int64), k)
+    offsets = (start[:, None] + np.arange(k)).ravel()
+    reviewee = seat[(position[reviewer] + offsets) % n]
+    return members[reviewer].astype(np.int32), members[reviewee].astype(np.int32)
+
+
+def generate_synthetic_org(n_employees, categories, reviews_per_employee=5, seed=None, departments=None):
+    """Random org: objective scores, and peer reviews that loosely follow them.
+
+    With ``departments``, employees are split into that many random
+    departments and only review colleagues in their own department.
+    """
+    rng = np.random.default_rng(seed)
+    n = n_employees
+    width = max(3, len(str(n)))
+    codes = [f"EMP{i:0{width}d}" for i in range(1, n + 1)]
+    full_names = np.array([f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES], dtype=object)
+    names = full_names[rng.integers(0, len(full_names), n)].tolist()
+    objective = rng.integers(1, 6, (n, len(categories)), dtype=np.uint8)
+
+    if departments is None:
+        reviewer, reviewee = ring_reviews(rng, np.arange(n), reviews_per_employee)
+    else:
+        department = rng.integers(0, departments, n)
+        by_department = np.argsort(department, kind="stable")
+        bounds = np.searchsorted(department[by_department], np.arange(departments + 1))
+        pairs = [ring_reviews(rng, by_department[bounds[d]:bounds[d + 1]], reviews_per_employee)
+                 for d in range(departments) if bounds[d + 1] > bounds[d]]
+        reviewer = np.concatenate([r for r, _ in pairs]) if pairs else np.zeros(0, dtype=np.int32)
+        reviewee = np.concatenate([e for _, e in pairs]) if pairs else np.zeros(0, dtype=np.int32)
+
+    noise = rng.integers(-1, 2, (len(reviewer), len(categories)))
+    ratings = np.clip(objective[reviewee].astype(np.int16) + noise, 1, 5).astype(np.uint8)
+    return AppraisalCycle(names, codes, list(categories), objective,
+                          ReviewArrays(reviewer, reviewee, ratings))
@@ -0,0 +1,182 @@
+"""Timing spans, counters and optional cProfile capture for the pipeline.
+
+Code is instrumented against the module-level ``metrics`` object:
+
+    with metrics.span("analysis.similarity"):
+        ...
+    metrics.count("reviews_processed", len(reviews))
+
+While ``metrics.enabled`` is false, ``span`` hands back one shared no-op
+context manager and ``count`` returns after a single attribute check, so
+instrumented code costs next to nothing. Set ``APPRAISAL_METRICS=1`` to turn
+it on at startup, or toggle it from the GUI's Performance tab.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class SpanStats:
+    __slots__ = ('calls', 'total', 'last', 'max')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+
+class Instrumentation:
+    """Thread-safe span and counter registry; analysis runs on a worker thread."""
+
+    def __init__(self, enabled=False, profile=False):
+        self.enabled = enabled
+        self.profile = profile
+        self.lock = threading.Lock()
+        self.spans = {}
+        self.counters = {}
+        self.last_profile = None
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.calls += 1
+            stats.total += seconds
+            stats.last = seconds
+            stats.max = max(stats.max, seconds)
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def profiled(self, func, *args, **kwargs):
+        """Call ``func``, under cProfile when profiling is on.
+
+        cProfile only sees the calling thread, so wrap the work itself (e.g.
+        inside the analysis worker), not the code that starts it.
+        """
+        if not self.profile:
+            return func(*args, **kwargs)
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            self.last_profile = pstats.Stats(profiler)
+
+    def profile_text(self, limit=30, sort='cumulative'):
+        if self.last_profile is None:
+            return ""
+        out = io.StringIO()
+        self.last_profile.stream = out
+        self.last_profile.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def dump_profile(self, path):
+        if self.last_profile is None:
+            raise RuntimeError("no profile has been captured")
+        self.last_profile.dump_stats(path)
+
+    def reset(self):
+        with self.lock:
+            self.spans = {}
+            self.counters = {}
+        self.last_profile = None
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'spans': {name: {'calls': s.calls, 'total_seconds': s.total,
+                                 'last_seconds': s.last, 'max_seconds': s.max}
+                          for name, s in self.spans.items()},
+                'counters': dict(self.counters)
+            }
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP appraisal_span_seconds_total Time spent in each pipeline stage.",
+            "# TYPE appraisal_span_seconds_total counter"
+        ]
+        for name, s in sorted(snapshot['spans'].items()):
+            lines.append(f'appraisal_span_seconds_total{{span="{name}"}} {s["total_seconds"]:.9f}')
+        lines += ["# HELP appraisal_span_calls_total Times each pipeline stage ran.",
+                  "# TYPE appraisal_span_calls_total counter"]
+        for name, s in sorted(snapshot['spans'].items()):
+            lines.append(f'appraisal_span_calls_total{{span="{name}"}} {s["calls"]}')
+        lines += ["# HELP appraisal_span_max_seconds Slowest single run of each pipeline stage.",
+                  "# TYPE appraisal_span_max_seconds gauge"]
+        for name, s in sorted(snapshot['spans'].items()):
+            lines.append(f'appraisal_span_max_seconds{{span="{name}"}} {s["max_seconds"]:.9f}')
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f"# TYPE appraisal_{name}_total counter")
+            lines.append(f"appraisal_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write the metrics to ``path``: Prometheus text for .prom/.txt, JSON otherwise."""
+        if os.path.splitext(path)[1].lower() in ('.prom', '.txt'):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.snapshot(), indent=2)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def summary(self):
+        """Plain-text table of spans and counters for display."""
+        snapshot = self.snapshot()
+        lines = [f"{'span':<28} {'calls':>6} {'total s':>10} {'last s':>10} {'max s':>10}"]
+        for name, s in sorted(snapshot['spans'].items()):
+            lines.append(f"{name:<28} {s['calls']:>6} {s['total_seconds']:>10.4f} "
+                         f"{s['last_seconds']:>10.4f} {s['max_seconds']:>10.4f}")
+        lines.append("")
+        lines.append(f"{'counter':<28} {'value':>10}")
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f"{name:<28} {value:>10}")
+        return "\n".join(lines)
+
+
+metrics = Instrumentation(enabled=os.environ.get("APPRAISAL_METRICS") == "1")
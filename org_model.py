@@ -0,0 +1,70 @@
+"""Compact, integer-indexed appraisal data.
+
+Employees are dense ids ``0..n-1``; the id indexes the parallel ``codes``
+and ``names`` lists, so two employees may share a display name. Reviews are
+kept column-wise in a ``ReviewLog``: int32 reviewer and reviewee columns and
+one uint8 (n_reviews, n_categories) rating block, about 16 bytes per review
+with the default categories instead of a tuple and a dict of strings each.
+A log restored from a snapshot uses the memory-mapped columns as they are
+and only copies them when it first has to grow.
+"""
+import numpy as np
+
+from scoring_engine import ReviewArrays
+
+
+class ReviewLog:
+    """Append-only review columns with amortized O(1) appends."""
+
+    def __init__(self, n_categories, capacity=1024):
+        self.n_reviews = 0
+        self.reviewer = np.zeros(capacity, dtype=np.int32)
+        self.reviewee = np.zeros(capacity, dtype=np.int32)
+        self.ratings = np.zeros((capacity, n_categories), dtype=np.uint8)
+
+    @classmethod
+    def from_arrays(cls, reviews):
+        # Columns already in the log's dtypes are adopted, not copied; they
+        # are full, so the first append grows them into fresh buffers
+        n = len(reviews)
+        log = cls(reviews.ratings.shape[1], capacity=0)
+        log.reviewer = np.asarray(reviews.reviewer_idx, dtype=np.int32)
+        log.reviewee = np.asarray(reviews.reviewee_idx, dtype=np.int32)
+        log.ratings = np.asarray(reviews.ratings, dtype=np.uint8)
+        log.n_reviews = n
+        return log
+
+    def __len__(self):
+        return self.n_reviews
+
+    def _grow(self):
+        capacity = max(2 * len(self.reviewer), 1024)
+        for name in ('reviewer', 'reviewee', 'ratings'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def append(self, reviewer, reviewee, ratings):
+        """Record one review; ``ratings`` are in category order. Returns its position."""
+        if self.n_reviews == len(self.reviewer):
+            self._grow()
+        pos = self.n_reviews
+        self.reviewer[pos] = reviewer
+        self.reviewee[pos] = reviewee
+        self.ratings[pos] = ratings
+        self.n_reviews += 1
+        return pos
+
+    def reviews_of(self, reviewee):
+        """Positions of the reviews of ``reviewee``, in submission order."""
+        return np.flatnonzero(self.reviewee[:self.n_reviews] == reviewee)
+
+    def arrays(self):
+        """The submitted reviews as ReviewArrays over the log's own columns."""
+        m = self.n_reviews
+        return ReviewArrays(self.reviewer[:m], self.reviewee[:m], self.ratings[:m])
+
+    def nbytes(self):
+        m = self.n_reviews
+        return self.reviewer[:m].nbytes + self.reviewee[:m].nbytes + self.ratings[:m].nbytes
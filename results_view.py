@@ -0,0 +1,216 @@
+"""Virtualized appraisal results table.
+
+Only a window of ``rows`` Treeview items ever exists; scrolling rebinds their
+values from the result arrays instead of inserting one item per employee.
+Sorting and filtering run on the arrays, and the per-reviewer breakdown of
+a row is built only when that row is expanded. The selection is tracked by
+array position, so it follows its employee as the slots are rebound.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+
+from instrumentation import metrics
+
+COLUMNS = ('id', 'name', 'final_score', 'status', 'verdict')
+HEADINGS = {'id': "ID", 'name': "Name", 'final_score': "Final Score",
+            'status': "Status", 'verdict': "Verdict"}
+PLACEHOLDER = "loading"
+
+
+class VirtualResultsTable(ttk.Frame):
+    def __init__(self, master, details_provider, on_select=None, rows=20):
+        super().__init__(master)
+        self.details_provider = details_provider
+        self.on_select = on_select
+        self.rows = rows
+        self.offset = 0
+        self.expanded = set()
+        self.selected = None
+        self.sort_column = None
+        self.sort_descending = False
+        self.set_rows([], [], np.zeros(0), np.zeros(0, dtype=bool), np.zeros(0, dtype=bool))
+
+        # Filter bar
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text="Status:").pack(side=tk.LEFT)
+        self.status_filter = tk.StringVar(value="All")
+        ttk.Combobox(filter_frame, textvariable=self.status_filter, state="readonly", width=10,
+                     values=["All", "COMPLETE", "PENDING"]).pack(side=tk.LEFT, padx=5)
+        ttk.Label(filter_frame, text="Verdict:").pack(side=tk.LEFT)
+        self.verdict_filter = tk.StringVar(value="All")
+        ttk.Combobox(filter_frame, textvariable=self.verdict_filter, state="readonly", width=10,
+                     values=["All", "APPROVED", "REJECTED"]).pack(side=tk.LEFT, padx=5)
+        ttk.Label(filter_frame, text="Search:").pack(side=tk.LEFT)
+        self.search = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.search, width=20).pack(side=tk.LEFT, padx=5)
+        self.count_label = ttk.Label(filter_frame, text="")
+        self.count_label.pack(side=tk.RIGHT)
+        for var in (self.status_filter, self.verdict_filter, self.search):
+            var.trace_add("write", lambda *args: self.apply_filter())
+
+        # Fixed pool of rows plus a scrollbar driven by the array offset
+        table_frame = ttk.Frame(self)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(table_frame, columns=COLUMNS, show="tree headings",
+                                 height=rows, selectmode="browse")
+        self.tree.column("#0", width=30, stretch=False)
+        for column in COLUMNS:
+            self.tree.heading(column, text=HEADINGS[column],
+                              command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=200 if column == 'name' else 110, anchor="w")
+        self.scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.on_scroll)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.slots = [self.tree.insert("", "end", iid=f"slot{i}") for i in range(rows)]
+        self.tree.bind("<<TreeviewOpen>>", self.on_open)
+        self.tree.bind("<<TreeviewClose>>", self.on_close)
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_rows(-1 if e.delta > 0 else 1))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_rows(-1))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_rows(1))
+        self.render()
+
+    def set_rows(self, codes, names, final_score, complete, approved):
+        """Replace the table contents; positions index the given arrays."""
+        self.codes = np.asarray(codes, dtype=str)
+        self.names = np.asarray(names, dtype=str)
+        self.search_text = np.char.lower(np.char.add(np.char.add(self.codes, " "), self.names))
+        self.final_score = np.asarray(final_score, dtype=float)
+        self.complete = np.asarray(complete, dtype=bool)
+        self.approved = np.asarray(approved, dtype=bool)
+        self.order = self.sorted_order()
+        self.view = self.order
+        self.expanded = set()
+        self.selected = None
+        self.offset = 0
+        if hasattr(self, 'tree'):
+            self.apply_filter()
+
+    def sort_key(self, column):
+        if column == 'id':
+            return self.codes
+        if column == 'name':
+            return self.names
+        if column == 'final_score':
+            return self.final_score
+        if column == 'status':
+            return self.complete
+        return self.approved
+
+    def sorted_order(self):
+        if self.sort_column is None:
+            return np.arange(len(self.codes))
+        order = np.argsort(self.sort_key(self.sort_column), kind="stable")
+        return order[::-1] if self.sort_descending else order
+
+    def sort_by(self, column):
+        # Clicking the same heading again flips the direction
+        self.sort_descending = column == self.sort_column and not self.sort_descending
+        self.sort_column = column
+        self.order = self.sorted_order()
+        self.apply_filter()
+
+    def apply_filter(self):
+        mask = np.ones(len(self.codes), dtype=bool)
+        status, verdict = self.status_filter.get(), self.verdict_filter.get()
+        if status != "All":
+            mask &= self.complete == (status == "COMPLETE")
+        if verdict != "All":
+            mask &= self.approved == (verdict == "APPROVED")
+        query = self.search.get().strip().lower()
+        if query:
+            mask &= np.char.find(self.search_text, query) >= 0
+        self.view = self.order[mask[self.order]]
+        self.offset = 0
+        self.expanded = set()
+        self.count_label.configure(text=f"{len(self.view)} of {len(self.codes)} employees")
+        self.render()
+
+    def row_values(self, pos):
+        return (self.codes[pos], self.names[pos], f"{self.final_score[pos]:.2f}",
+                "COMPLETE" if self.complete[pos] else "PENDING",
+                "APPROVED" if self.approved[pos] else "REJECTED")
+
+    def render(self):
+        selected_slot = None
+        for slot, iid in enumerate(self.slots):
+            index = self.offset + slot
+            self.clear_children(iid)
+            if index >= len(self.view):
+                self.tree.detach(iid)
+                continue
+            pos = self.view[index]
+            if pos == self.selected:
+                selected_slot = iid
+            self.tree.move(iid, "", slot)
+            self.tree.item(iid, values=self.row_values(pos), open=pos in self.expanded)
+            if pos in self.expanded:
+                self.fill_details(iid, pos)
+            else:
+                self.tree.insert(iid, "end", text=PLACEHOLDER)
+        # Highlight the slot now showing the selected employee, if any
+        wanted = (selected_slot,) if selected_slot is not None else ()
+        if tuple(self.tree.selection()) != wanted:
+            self.tree.selection_remove(*self.tree.selection())
+            if selected_slot is not None:
+                self.tree.selection_set(selected_slot)
+        metrics.count("widget_operations", len(self.slots))
+        total = max(len(self.view), 1)
+        self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.rows) / total))
+
+    def clear_children(self, iid):
+        children = self.tree.get_children(iid)
+        if children:
+            self.tree.delete(*children)
+
+    def fill_details(self, iid, pos):
+        self.clear_children(iid)
+        for values in self.details_provider(pos):
+            self.tree.insert(iid, "end", values=values)
+
+    def position_of(self, iid):
+        if iid not in self.slots:
+            return None
+        index = self.offset + self.slots.index(iid)
+        return self.view[index] if index < len(self.view) else None
+
+    def on_open(self, event):
+        iid = self.tree.focus()
+        pos = self.position_of(iid)
+        if pos is not None:
+            self.expanded.add(pos)
+            self.fill_details(iid, pos)
+
+    def on_close(self, event):
+        pos = self.position_of(self.tree.focus())
+        self.expanded.discard(pos)
+
+    def on_tree_select(self, event):
+        # render() moving the highlight with its employee also lands here;
+        # only a newly selected employee is reported
+        selection = self.tree.selection()
+        pos = self.position_of(selection[0]) if selection else None
+        if pos is None or pos == self.selected:
+            return
+        self.selected = pos
+        if self.on_select is not None:
+            self.on_select(pos)
+
+    def scroll_rows(self, delta):
+        limit = max(len(self.view) - self.rows, 0)
+        offset = min(max(self.offset + delta, 0), limit)
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_rows(int(float(amount) * len(self.view)) - self.offset)
+        elif unit == "pages":
+            self.scroll_rows(int(amount) * self.rows)
+        else:
+            self.scroll_rows(int(amount))
@@ -0,0 +1,72 @@
+"""Peer review form, built once and refilled for every reviewee.
+
+Rebuilding the canvas, frames, labels and one slider per category for each
+review dominated the time to switch reviewees; ``load`` only rebinds label
+text and resets the rating variables.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+DEFAULT_RATING = 3
+
+
+class ReviewForm(ttk.Frame):
+    def __init__(self, master, categories, on_submit, colors):
+        super().__init__(master)
+        self.categories = list(categories)
+
+        # Scrollable content
+        self.canvas = tk.Canvas(self, bg=colors['background'])
+        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        content = ttk.Frame(self.canvas)
+        content.bind(
+            "<Configure>",
+            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+        self.canvas.create_window((0, 0), window=content, anchor="nw")
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self.reviewer_label = ttk.Label(content)
+        self.reviewer_label.pack(anchor="w")
+        ttk.Label(content,
+                  text="Reviewing Employee: [Name and ID Hidden Until Results]").pack(anchor="w", pady=(0, 20))
+
+        self.description_labels = []
+        self.rating_vars = []
+        for cat in self.categories:
+            frame = ttk.Frame(content)
+            frame.pack(fill=tk.X, padx=5, pady=5)
+
+            ttk.Label(frame, text=f"{cat}:").pack(anchor="w")
+            description = ttk.Label(frame, wraplength=700)
+            description.pack(anchor="w", padx=10)
+
+            # Rating slider
+            slider_frame = ttk.Frame(frame)
+            slider_frame.pack(fill=tk.X, padx=10, pady=5)
+
+            ttk.Label(slider_frame, text="1").pack(side="left")
+            var = tk.IntVar(value=DEFAULT_RATING)
+            tk.Scale(slider_frame, from_=1, to=5, orient="horizontal",
+                     variable=var, bg=colors['panel']).pack(side="left", padx=5, fill=tk.X, expand=True)
+            ttk.Label(slider_frame, text="5").pack(side="left")
+
+            self.description_labels.append(description)
+            self.rating_vars.append(var)
+
+        ttk.Button(content,
+                   text="Submit Review",
+                   command=on_submit).pack(pady=20)
+
+    def load(self, reviewer_code, descriptions):
+        """Show a new review: ``descriptions`` holds one text per category."""
+        self.reviewer_label.configure(text=f"Reviewer ID: {reviewer_code}")
+        for label, text, var in zip(self.description_labels, descriptions, self.rating_vars):
+            label.configure(text=text)
+            var.set(DEFAULT_RATING)
+        self.canvas.yview_moveto(0)
+
+    def ratings(self):
+        """The current ratings, in category order."""
+        return [var.get() for var in self.rating_vars]
@@ -0,0 +1,359 @@
+"""Local HTTP service that hands out review assignments and collects reviews.
+
+Many reviewers can work at once against one appraisal cycle. The service is
+a single asyncio event loop on ``asyncio.start_server`` with a small
+HTTP/1.1 layer (keep-alive, JSON bodies):
+
+    GET  /cycle                  categories, codes, names and objective scores
+    GET  /assignment?reviewer=i  {"reviewee": id or null, "planned": bool}
+    POST /reviews                {"reviewer": i, "reviewee": j, "ratings": [...]}
+    GET  /reviews?since=k        reviews from position k, as parallel lists
+    GET  /stats                  request, review and batch counters
+
+A submission is validated and its (reviewer, reviewee) pair reserved in
+``ReviewStore.add_review`` in one step with no ``await`` in between, so two
+concurrent submissions of the same pair cannot both pass: the second gets
+409. Accepted reviews wait in the store's queue; one writer task inserts
+whatever has queued up as a single transaction on a dedicated thread, then
+answers every submission in the batch with 201. Under load, reviews arriving
+while a batch is being written form the next batch. Assignments come from the
+reviewer's planned queue, then from random sampling; a reviewer found to have
+reviewed everyone is remembered, so the loop never scans the org for them again.
+
+    python review_service.py --store appraisal_cycle.db --port 8765
+    python employee_appraisal_gui.py --server http://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import json
+import signal
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from appraisal_core import AppraisalCore
+from assignment import plan_assignments, sample_unreviewed
+from ingest import generate_synthetic_org
+from instrumentation import metrics
+from review_store import AppraisalCycle, ReviewStore
+from scoring_engine import ReviewArrays, MAX_RATING
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# A batch is written as soon as this many reviews are queued, or after
+# BATCH_WINDOW seconds, whichever comes first
+BATCH_SIZE = 256
+BATCH_WINDOW = 0.002
+REVIEW_PAGE = 50000
+MAX_BODY = 65536
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ReviewService:
+    def __init__(self, store, batch_size=BATCH_SIZE, batch_window=BATCH_WINDOW):
+        # store must be opened with batch_size=0 and check_same_thread=False:
+        # the service decides when to write, and writes off the event loop
+        self.store = store
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.core = AppraisalCore()
+        self.core.apply_cycle(store.load())
+        self.assignments = plan_assignments(len(self.core.employees), existing=store.reviewed_pairs())
+        self.exhausted = set()
+        self.writer = ThreadPoolExecutor(max_workers=1)
+        self.waiters = []
+        self.has_pending = None
+        self.writer_task = None
+        self.closing = False
+        self.stats = {'requests': 0, 'reviews_accepted': 0, 'reviews_rejected': 0, 'batches_written': 0,
+                      'assignments_planned': 0, 'assignments_unplanned': 0}
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, backlog=4096):
+        self.has_pending = asyncio.Event()
+        self.writer_task = asyncio.create_task(self.write_batches())
+        return await asyncio.start_server(self.handle_connection, host, port, backlog=backlog)
+
+    async def stop(self):
+        # Write what is queued, then compact so the next load is quick
+        self.closing = True
+        if self.writer_task is not None:
+            self.has_pending.set()
+            await self.writer_task
+        await self.write_batch()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.writer, self.store.compact)
+        await loop.run_in_executor(self.writer, self.store.close)
+        self.writer.shutdown()
+
+    # Writes
+
+    async def write_batches(self):
+        while not self.closing:
+            await self.has_pending.wait()
+            if not self.closing and len(self.waiters) < self.batch_size:
+                await asyncio.sleep(self.batch_window)
+            self.has_pending.clear()
+            await self.write_batch()
+
+    async def write_batch(self):
+        rows, waiters = self.store.take_pending(), self.waiters
+        self.waiters = []
+        if not rows:
+            return
+        try:
+            with metrics.span("service.write_batch"):
+                await asyncio.get_running_loop().run_in_executor(self.writer, self.store.write_reviews, rows)
+        except Exception as exc:
+            self.store.discard_pairs((reviewer, reviewee) for _, reviewer, reviewee, _ in waiters)
+            self.exhausted.difference_update(reviewer for _, reviewer, _, _ in waiters)
+            for future, *_ in waiters:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.stats['batches_written'] += 1
+        metrics.count("service_batches")
+        for future, reviewer, reviewee, ratings in waiters:
+            self.core.record_review(reviewer, reviewee, ratings)
+            if not future.done():
+                future.set_result(True)
+
+    async def submit(self, reviewer, reviewee, ratings):
+        """Validate and queue one review; resolves once its batch is committed."""
+        n = len(self.core.employees)
+        if not (0 <= reviewer < n and 0 <= reviewee < n):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "unknown employee")
+        if reviewer == reviewee:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "employees cannot review themselves")
+        if len(ratings) != len(self.core.categories) or not all(1 <= r <= MAX_RATING for r in ratings):
+            raise RequestError(HTTPStatus.BAD_REQUEST,
+                               f"expected {len(self.core.categories)} ratings from 1 to {MAX_RATING:g}")
+        # Check and reserve the pair in one step; nothing may await before this
+        if not self.store.add_review(reviewer, reviewee, ratings):
+            self.stats['reviews_rejected'] += 1
+            raise RequestError(HTTPStatus.CONFLICT, "this reviewer has already reviewed this employee")
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((future, reviewer, reviewee, ratings))
+        self.has_pending.set()
+        await future
+        self.stats['reviews_accepted'] += 1
+
+    # Reads
+
+    def cycle(self):
+        return {
+            'categories': self.core.categories,
+            'codes': self.core.employee_ids,
+            'names': self.core.employees,
+            'objective': self.core.objective.tolist()
+        }
+
+    def assignment(self, reviewer):
+        if not 0 <= reviewer < len(self.core.employees):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "unknown employee")
+        reviewee = self.assignments.next_reviewee(reviewer, self.store.has_pair)
+        planned = reviewee is not None
+        if planned:
+            self.stats['assignments_planned'] += 1
+        elif reviewer not in self.exhausted:
+            reviewee = sample_unreviewed(reviewer, len(self.core.employees), self.store.has_pair)
+            if reviewee is None:
+                self.exhausted.add(reviewer)
+            else:
+                self.stats['assignments_unplanned'] += 1
+        return {'reviewer': reviewer, 'reviewee': reviewee, 'planned': planned}
+
+    def reviews(self, since):
+        log = self.core.review_log
+        stop = min(len(log), since + REVIEW_PAGE)
+        return {
+            'since': since,
+            'reviewer': log.reviewer[since:stop].tolist(),
+            'reviewee': log.reviewee[since:stop].tolist(),
+            'ratings': log.ratings[since:stop].tolist()
+        }
+
+    # HTTP
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        def int_param(name, default=None):
+            value = query.get(name)
+            if value is None and default is not None:
+                return default
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"'{name}' must be an integer")
+
+        if method == 'GET' and url.path == '/cycle':
+            return HTTPStatus.OK, self.cycle()
+        if method == 'GET' and url.path == '/assignment':
+            return HTTPStatus.OK, self.assignment(int_param('reviewer'))
+        if method == 'GET' and url.path == '/reviews':
+            return HTTPStatus.OK, self.reviews(max(int_param('since', 0), 0))
+        if method == 'GET' and url.path == '/stats':
+            return HTTPStatus.OK, dict(self.stats, reviews=len(self.core.review_log))
+        if method == 'POST' and url.path == '/reviews':
+            try:
+                review = json.loads(body)
+                reviewer, reviewee = int(review['reviewer']), int(review['reviewee'])
+                ratings = [int(r) for r in review['ratings']]
+            except (ValueError, KeyError, TypeError):
+                raise RequestError(HTTPStatus.BAD_REQUEST, "expected reviewer, reviewee and ratings")
+            await self.submit(reviewer, reviewee, ratings)
+            return HTTPStatus.CREATED, {'status': 'accepted'}
+        raise RequestError(HTTPStatus.NOT_FOUND, f"no route for {method} {url.path}")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    raise ValueError("request body too large")
+                body = await reader.readexactly(length) if length else b''
+
+                self.stats['requests'] += 1
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except RequestError as exc:
+                    status, payload = exc.status, {'error': str(exc)}
+                except Exception as exc:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(exc)}
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                data = json.dumps(payload).encode()
+                head = [f"HTTP/1.1 {status.value} {status.phrase}",
+                        "Content-Type: application/json",
+                        f"Content-Length: {len(data)}"]
+                if not keep_alive:
+                    head.append("Connection: close")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Malformed request or the client went away: drop the connection
+            pass
+        finally:
+            writer.close()
+
+
+class ReviewClient:
+    """Blocking client for the review service, used by the GUI."""
+
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method, path, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as exc:
+            return exc.code, json.load(exc)
+
+    def cycle(self):
+        """The cycle's employees and objective scores, without reviews."""
+        _, cycle = self._request('GET', '/cycle')
+        n_categories = len(cycle['categories'])
+        objective = np.array(cycle['objective'], dtype=np.uint8).reshape(-1, n_categories)
+        no_reviews = ReviewArrays(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32),
+                                  np.zeros((0, n_categories), dtype=np.uint8))
+        return AppraisalCycle(cycle['names'], cycle['codes'], cycle['categories'], objective, no_reviews)
+
+    def next_assignment(self, reviewer):
+        status, body = self._request('GET', f'/assignment?reviewer={reviewer}')
+        if status != HTTPStatus.OK:
+            raise ValueError(body['error'])
+        return body['reviewee']
+
+    def submit(self, reviewer, reviewee, ratings):
+        """True once stored, False if the pair was already reviewed."""
+        status, body = self._request('POST', '/reviews', {'reviewer': reviewer, 'reviewee': reviewee,
+                                                          'ratings': list(ratings)})
+        if status == HTTPStatus.CONFLICT:
+            return False
+        if status != HTTPStatus.CREATED:
+            raise ValueError(body['error'])
+        return True
+
+    def reviews_since(self, since):
+        """Reviews from position ``since`` on, page by page, as (reviewer, reviewee, ratings) lists."""
+        while True:
+            _, page = self._request('GET', f'/reviews?since={since}')
+            if not page['reviewer']:
+                return
+            yield page['reviewer'], page['reviewee'], page['ratings']
+            since += len(page['reviewer'])
+
+
+async def serve(store, host, port):
+    service = ReviewService(store)
+    server = await service.start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Serving {len(service.core.employees)} employees on http://{address[0]}:{address[1]}", flush=True)
+    # SIGTERM and SIGINT stop the service cleanly where the loop can catch
+    # them; elsewhere (Windows) Ctrl+C cancels this task and the finally runs
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    try:
+        async with server:
+            await stopping.wait()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve review assignments and collect reviews")
+    parser.add_argument("--store", required=True, help="SQLite appraisal cycle")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="start a new cycle of N generated employees with no reviews")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    store = ReviewStore(args.store, batch_size=0, check_same_thread=False)
+    if args.synthetic:
+        store.save_cycle(generate_synthetic_org(args.synthetic, AppraisalCore().categories,
+                                                reviews_per_employee=0, seed=args.seed))
+    elif store.is_empty():
+        raise SystemExit(f"{args.store} holds no appraisal cycle; start one with --synthetic")
+    try:
+        asyncio.run(serve(store, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Persistent review store for an appraisal cycle.
+
+Reviews are written to SQLite in WAL mode, indexed by reviewee and by
+reviewer, and inserted in batched transactions. ``compact`` writes a
+columnar snapshot (one ``.npy`` file per column) next to the database, and
+``load`` memory-maps that snapshot and reads only the rows added after it.
+The snapshot also holds the sorted (reviewer, reviewee) pair keys, so
+duplicate checks are a binary search in the mapped array plus a set of the
+pairs added since, and nothing is rebuilt row by row on load.
+Each ``save_cycle`` bumps a generation number kept in ``meta`` and copied
+into the snapshot manifest; a snapshot from another generation (the process
+stopped between saving a cycle and compacting it) is rebuilt on load.
+A caller that batches writes itself (the review service) passes
+``batch_size=0`` and writes ``take_pending()`` with ``write_reviews``.
+"""
+import json
+import os
+import shutil
+import sqlite3
+
+import numpy as np
+
+from scoring_engine import ReviewArrays
+
+SNAPSHOT_SUFFIX = ".snapshot"
+MANIFEST = "manifest.json"
+
+
+class AppraisalCycle:
+    """Everything needed to restore one appraisal cycle."""
+
+    def __init__(self, names, codes, categories, objective, reviews):
+        self.names = names
+        self.codes = codes
+        self.categories = categories
+        self.objective = objective
+        self.reviews = reviews
+
+
+class ReviewStore:
+    def __init__(self, path, batch_size=64, check_same_thread=True):
+        self.path = path
+        self.batch_size = batch_size
+        self.snapshot_dir = path + SNAPSHOT_SUFFIX
+        self.conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS employees (
+                idx INTEGER PRIMARY KEY, code TEXT NOT NULL UNIQUE, name TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS objective_scores (
+                employee INTEGER PRIMARY KEY, scores BLOB NOT NULL);
+            CREATE TABLE IF NOT EXISTS reviews (
+                id INTEGER PRIMARY KEY, reviewer INTEGER NOT NULL, reviewee INTEGER NOT NULL,
+                ratings BLOB NOT NULL, UNIQUE (reviewer, reviewee));
+            CREATE INDEX IF NOT EXISTS reviews_by_reviewee ON reviews (reviewee, id);
+            CREATE INDEX IF NOT EXISTS reviews_by_reviewer ON reviews (reviewer, id);
+        """)
+        self.n_employees = self.conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+        self.pending = []
+        # Sorted keys of the pairs in the snapshot, and of pairs added since
+        self.pair_keys = np.empty(0, dtype=np.int64)
+        self.pairs = set()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def _pair_key(self, reviewer, reviewee):
+        return reviewer * self.n_employees + reviewee
+
+    def is_empty(self):
+        return self.n_employees == 0
+
+    def generation(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def save_cycle(self, cycle):
+        """Start a new cycle: replace employees, objective scores and reviews."""
+        objective = np.asarray(cycle.objective, dtype=np.uint8)
+        reviews = cycle.reviews
+        ratings = np.asarray(reviews.ratings, dtype=np.uint8)
+        with self.conn:
+            generation = self.generation() + 1
+            self.conn.execute("DELETE FROM reviews")
+            self.conn.execute("DELETE FROM objective_scores")
+            self.conn.execute("DELETE FROM employees")
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('categories', ?)",
+                              (json.dumps(list(cycle.categories)),))
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (str(generation),))
+            self.conn.executemany("INSERT INTO employees VALUES (?, ?, ?)",
+                                  ((i, code, name) for i, (code, name) in enumerate(zip(cycle.codes, cycle.names))))
+            self.conn.executemany("INSERT INTO objective_scores VALUES (?, ?)",
+                                  ((i, row.tobytes()) for i, row in enumerate(objective)))
+            self.conn.executemany("INSERT INTO reviews (reviewer, reviewee, ratings) VALUES (?, ?, ?)",
+                                  zip(reviews.reviewer_idx.tolist(), reviews.reviewee_idx.tolist(),
+                                      (row.tobytes() for row in ratings)))
+        self.n_employees = len(cycle.names)
+        self.pending = []
+        self.pair_keys = np.unique(reviews.reviewer_idx.astype(np.int64) * self.n_employees + reviews.reviewee_idx)
+        self.pairs = set()
+        self.compact()
+
+    def has_pair(self, reviewer, reviewee):
+        key = self._pair_key(reviewer, reviewee)
+        if key in self.pairs:
+            return True
+        i = np.searchsorted(self.pair_keys, key)
+        return bool(i < len(self.pair_keys) and self.pair_keys[i] == key)
+
+    def reviewed_pairs(self):
+        """All reviewed (reviewer, reviewee) pairs as an (n_pairs, 2) array."""
+        keys = np.concatenate([self.pair_keys, np.fromiter(self.pairs, dtype=np.int64, count=len(self.pairs))])
+        return np.stack([keys // max(self.n_employees, 1), keys % max(self.n_employees, 1)], axis=1)
+
+    def add_review(self, reviewer, reviewee, ratings):
+        """Queue a review for the next batched insert; False if the pair was already reviewed."""
+        if self.has_pair(reviewer, reviewee):
+            return False
+        self.pairs.add(self._pair_key(reviewer, reviewee))
+        self.pending.append((reviewer, reviewee, np.asarray(ratings, dtype=np.uint8).tobytes()))
+        if self.batch_size and len(self.pending) >= self.batch_size:
+            self.flush()
+        return True
+
+    def discard_pairs(self, pairs):
+        """Forget queued (reviewer, reviewee) pairs whose write failed, so they can be resubmitted."""
+        for reviewer, reviewee in pairs:
+            self.pairs.discard(self._pair_key(reviewer, reviewee))
+
+    def take_pending(self):
+        """Hand over the queued rows for ``write_reviews``; the queue starts empty again."""
+        rows, self.pending = self.pending, []
+        return rows
+
+    def write_reviews(self, rows):
+        """Insert queued rows in one transaction."""
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany("INSERT INTO reviews (reviewer, reviewee, ratings) VALUES (?, ?, ?)", rows)
+
+    def flush(self):
+        self.write_reviews(self.pending)
+        self.pending = []
+
+    def reviews_of(self, reviewee):
+        rows = self.conn.execute("SELECT reviewer, ratings FROM reviews WHERE reviewee = ? ORDER BY id",
+                                 (reviewee,)).fetchall()
+        return [(reviewer, np.frombuffer(ratings, dtype=np.uint8)) for reviewer, ratings in rows]
+
+    def reviews_by(self, reviewer):
+        rows = self.conn.execute("SELECT reviewee, ratings FROM reviews WHERE reviewer = ? ORDER BY id",
+                                 (reviewer,)).fetchall()
+        return [(reviewee, np.frombuffer(ratings, dtype=np.uint8)) for reviewee, ratings in rows]
+
+    def _read_reviews(self, after_id, n_categories):
+        rows = self.conn.execute("SELECT id, reviewer, reviewee, ratings FROM reviews WHERE id > ? ORDER BY id",
+                                 (after_id,)).fetchall()
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        reviewer = np.array([row[1] for row in rows], dtype=np.int32)
+        reviewee = np.array([row[2] for row in rows], dtype=np.int32)
+        ratings = np.frombuffer(b"".join(row[3] for row in rows), dtype=np.uint8)
+        return ids, reviewer, reviewee, ratings.reshape(len(rows), n_categories)
+
+    def compact(self):
+        """Write the current cycle as a columnar snapshot, replacing the old one."""
+        self.flush()
+        categories = json.loads(self.conn.execute("SELECT value FROM meta WHERE key = 'categories'").fetchone()[0])
+        employees = self.conn.execute("SELECT code, name FROM employees ORDER BY idx").fetchall()
+        objective = np.frombuffer(b"".join(row[0] for row in self.conn.execute(
+            "SELECT scores FROM objective_scores ORDER BY employee")), dtype=np.uint8)
+        ids, reviewer, reviewee, ratings = self._read_reviews(0, len(categories))
+
+        staging = self.snapshot_dir + ".tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        np.save(os.path.join(staging, "objective.npy"), objective.reshape(len(employees), len(categories)))
+        np.save(os.path.join(staging, "reviewer.npy"), reviewer)
+        np.save(os.path.join(staging, "reviewee.npy"), reviewee)
+        np.save(os.path.join(staging, "ratings.npy"), ratings)
+        np.save(os.path.join(staging, "pairs.npy"),
+                np.unique(reviewer.astype(np.int64) * len(employees) + reviewee))
+        with open(os.path.join(staging, MANIFEST), "w") as f:
+            json.dump({
+                'categories': categories,
+                'codes': [code for code, _ in employees],
+                'names': [name for _, name in employees],
+                'last_review_id': int(ids[-1]) if len(ids) else 0,
+                'generation': self.generation()
+            }, f)
+        shutil.rmtree(self.snapshot_dir, ignore_errors=True)
+        os.replace(staging, self.snapshot_dir)
+
+    def load(self):
+        """Restore the cycle from the memory-mapped snapshot plus newer rows."""
+        if not os.path.exists(os.path.join(self.snapshot_dir, MANIFEST)):
+            self.compact()
+        with open(os.path.join(self.snapshot_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+        # Review ids restart with each cycle, so an older cycle's snapshot
+        # cannot be topped up with newer rows; rebuild it instead
+        # (snapshots from before pairs.npy are rebuilt the same way)
+        if (manifest.get('generation', 0) != self.generation()
+                or not os.path.exists(os.path.join(self.snapshot_dir, "pairs.npy"))):
+            self.compact()
+            with open(os.path.join(self.snapshot_dir, MANIFEST)) as f:
+                manifest = json.load(f)
+        categories = manifest['categories']
+
+        def column(name):
+            return np.load(os.path.join(self.snapshot_dir, name + ".npy"), mmap_mode="r")
+
+        reviewer, reviewee, ratings = column("reviewer"), column("reviewee"), column("ratings")
+        _, new_reviewer, new_reviewee, new_ratings = self._read_reviews(manifest['last_review_id'],
+                                                                        len(categories))
+        self.n_employees = len(manifest['codes'])
+        self.pair_keys = column("pairs")
+        self.pairs = set((new_reviewer.astype(np.int64) * self.n_employees + new_reviewee).tolist())
+        # The mapped columns go to the caller as they are; only rows written
+        # since the last compact make them be joined into memory
+        if len(new_reviewer):
+            reviewer = np.concatenate([reviewer, new_reviewer])
+            reviewee = np.concatenate([reviewee, new_reviewee])
+            ratings = np.concatenate([ratings, new_ratings])
+        return AppraisalCycle(manifest['names'], manifest['codes'], categories,
+                              column("objective"), ReviewArrays(reviewer, reviewee, ratings))
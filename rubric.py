@@ -0,0 +1,42 @@
+"""Rating rubric: one description per category and score.
+
+The rubric is read once from ``descriptions.txt`` (a ``[Category]`` header
+followed by one line per score, 1 to 5) into a category x score table, so a
+description lookup is a dict hit and a tuple index.
+"""
+import os
+
+RUBRIC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "descriptions.txt")
+MAX_SCORE = 5
+
+
+def parse_rubric(text):
+    sections = {}
+    current = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            current = line[1:-1]
+            sections[current] = []
+        elif current is None:
+            raise ValueError(f"rubric text before the first [Category] header: {line!r}")
+        else:
+            sections[current].append(line)
+    return sections
+
+
+def load_rubric(categories, path=RUBRIC_PATH):
+    """Return ``{category: descriptions}`` where ``descriptions[score - 1]`` describes ``score``."""
+    with open(path, encoding="utf-8") as f:
+        sections = parse_rubric(f.read())
+    table = {}
+    for category in categories:
+        if category not in sections:
+            raise ValueError(f"{path}: no descriptions for {category}")
+        if len(sections[category]) != MAX_SCORE:
+            raise ValueError(f"{path}: {category} needs {MAX_SCORE} descriptions, "
+                             f"found {len(sections[category])}")
+        table[category] = tuple(sections[category])
+    return table
@@ -0,0 +1,302 @@
+"""Headless, vectorized scoring for the employee appraisal system.
+
+Reviews are held as flat index/rating arrays and every employee is scored in
+one batched NumPy computation. The cosine backends (sparse, numpy, dense,
+plus the incremental and sharded scorers) agree with
+``AppraisalCore.analyze_with_sklearn`` and the uniform weighting with
+``analyze_without_sklearn`` to within ``EQUIVALENCE_TOL`` (1e-9) on every
+score and weight, not bit for bit: summing in a different order leaves
+differences of a few ulps, under 3e-15 in practice, and a verdict may differ
+only for a score that close to the threshold. ``python -m
+benchmarks.equivalence`` checks this on seeded orgs. The 'category' weighting
+(see category_cf) scores per-category, bias-corrected ratings instead and
+has no legacy counterpart.
+"""
+import importlib.util
+
+import numpy as np
+
+# scikit-learn is optional and takes seconds to import, so only check that it
+# is installed; the 'dense' backend imports it on first use
+sklearn_available = importlib.util.find_spec("sklearn") is not None
+
+from sparse_similarity import scipy_available, sparse_cosine_review_weights
+from ann_index import top_k_review_weights
+from cancellation import check_cancelled
+from instrumentation import metrics
+
+OBJECTIVE_WEIGHT = 0.7
+PEER_WEIGHT = 0.3
+MAX_RATING = 5.0
+APPROVAL_THRESHOLD = 0.7
+EQUIVALENCE_TOL = 1e-9
+MIN_REVIEWS = 3
+# Neighbours kept per reviewer by the 'topk' weighting unless told otherwise
+DEFAULT_NEIGHBOURS = 10
+
+
+class ReviewArrays:
+    """Peer reviews as parallel arrays, one entry per submitted review.
+
+    Integer index columns are kept as given (int32 memory-mapped snapshot
+    columns are not copied); anything else is converted to int64.
+    """
+
+    def __init__(self, reviewer_idx, reviewee_idx, ratings):
+        self.reviewer_idx = index_array(reviewer_idx)
+        self.reviewee_idx = index_array(reviewee_idx)
+        self.ratings = np.asarray(ratings)
+        if self.ratings.ndim != 2 or len(self.ratings) != len(self.reviewer_idx):
+            raise ValueError("ratings must have shape (n_reviews, n_categories)")
+
+    def __len__(self):
+        return len(self.reviewer_idx)
+
+    def review_means(self):
+        return self.ratings.mean(axis=1)
+
+    def last_per_pair(self, n):
+        # Positions of the last review for each (reviewer, reviewee) pair, the
+        # one that wins when the user-item matrix is written review by review
+        keys = self.reviewer_idx.astype(np.int64) * n + self.reviewee_idx
+        _, first_from_end = np.unique(keys[::-1], return_index=True)
+        return np.sort(len(keys) - 1 - first_from_end)
+
+
+def index_array(values):
+    values = np.asarray(values)
+    return values if values.dtype.kind in 'iu' else values.astype(np.int64)
+
+
+def user_item_matrix(n, reviews):
+    """Dense reviewer x reviewee matrix of mean ratings, zero where unrated."""
+    keep = reviews.last_per_pair(n)
+    matrix = np.zeros((n, n))
+    matrix[reviews.reviewer_idx[keep], reviews.reviewee_idx[keep]] = reviews.review_means()[keep]
+    return matrix
+
+
+def numpy_cosine_similarity(matrix):
+    """Row-wise cosine similarity computed like sklearn's: normalize, then X @ X.T."""
+    norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+    # All-zero rows keep a zero similarity with everyone, as in sklearn
+    unit = matrix / np.where(norms > 0, norms, 1.0)[:, None]
+    return unit @ unit.T
+
+
+def cosine_review_weights(n, reviews, use_sklearn=False, cancel=None):
+    # Weight of each review: the mean of the reviewer's similarity row with the
+    # reviewee's column left out, i.e. (row sum - sim[reviewer, reviewee]) / (n - 1)
+    with metrics.span("analysis.user_item_matrix"):
+        matrix = user_item_matrix(n, reviews)
+    check_cancelled(cancel)
+    if use_sklearn:
+        from sklearn.metrics.pairwise import cosine_similarity
+        sim = cosine_similarity(matrix)
+    else:
+        sim = numpy_cosine_similarity(matrix)
+    row_sum = sim.sum(axis=1)
+    rv, re = reviews.reviewer_idx, reviews.reviewee_idx
+    return (row_sum[rv] - sim[rv, re]) / max(n - 1, 1)
+
+
+class ScoreResult:
+    """Per-employee score arrays produced by ``ScoringEngine.score``."""
+
+    def __init__(self, engine, order, objective_mean, weighted_peer_avg,
+                 final_score, review_count, review_weight, review_avg):
+        self.engine = engine
+        self.order = order
+        self.objective_mean = objective_mean
+        self.weighted_peer_avg = weighted_peer_avg
+        self.final_score = final_score
+        self.review_count = review_count
+        self.review_weight = review_weight
+        self.review_avg = review_avg
+        self.complete = review_count >= MIN_REVIEWS
+        self.approved = final_score >= APPROVAL_THRESHOLD
+        self._reviews_by_employee = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def status(self, i):
+        return "COMPLETE" if self.complete[i] else "PENDING"
+
+    def verdict(self, i):
+        return "APPROVED" if self.approved[i] else "REJECTED"
+
+    def reviews_of(self, i):
+        """Review positions for employee index ``i``, in submission order."""
+        if self._reviews_by_employee is None:
+            reviewee = self.engine.reviews.reviewee_idx
+            by_reviewee = np.argsort(reviewee, kind="stable")
+            bounds = np.searchsorted(reviewee[by_reviewee], np.arange(len(self.engine.employees) + 1))
+            self._reviews_by_employee = (by_reviewee, bounds)
+        by_reviewee, bounds = self._reviews_by_employee
+        return by_reviewee[bounds[i]:bounds[i + 1]]
+
+    def details(self, i):
+        engine = self.engine
+        reviews = engine.reviews
+        categories = engine.categories
+        reviewer_details = []
+        for pos in self.reviews_of(i):
+            ratings = dict(zip(categories, reviews.ratings[pos].tolist()))
+            reviewer_details.append((int(reviews.reviewer_idx[pos]), ratings,
+                                     self.review_weight[pos], self.review_avg[pos]))
+        return {
+            'final_score': self.final_score[i],
+            'objective_scores': dict(zip(categories, engine.objective[i].tolist())),
+            'objective_mean': self.objective_mean[i],
+            'reviewer_details': reviewer_details,
+            'weighted_peer_avg': self.weighted_peer_avg[i],
+            'status': self.status(i),
+            'verdict': self.verdict(i)
+        }
+
+    def iter_details(self):
+        for i in self.order:
+            yield int(i), self.details(i)
+
+    def to_dict(self):
+        """Results as ``{employee id: details}``, the shape of ``analyze_with_sklearn``."""
+        return dict(self.iter_details())
+
+
+class ScoringEngine:
+    """Scores every reviewed employee in one batched pass."""
+
+    def __init__(self, employees, categories, objective, reviews):
+        self.employees = list(employees)
+        self.categories = list(categories)
+        self.objective = np.asarray(objective)
+        self.reviews = reviews
+        if self.objective.shape != (len(self.employees), len(self.categories)):
+            raise ValueError("objective scores must have shape (n_employees, n_categories)")
+
+    @classmethod
+    def from_app(cls, app):
+        return cls(app.employees, app.categories, app.objective, app.review_log.arrays())
+
+    def review_weights(self, weighting, backend='auto', k=DEFAULT_NEIGHBOURS, cancel=None):
+        n = len(self.employees)
+        if weighting == 'cosine':
+            if backend == 'auto':
+                backend = 'sparse' if scipy_available else 'numpy'
+            if backend == 'sparse':
+                if not scipy_available:
+                    raise RuntimeError("sparse similarity requires scipy")
+                return sparse_cosine_review_weights(n, self.reviews, cancel)
+            if backend == 'numpy':
+                return cosine_review_weights(n, self.reviews, cancel=cancel)
+            if backend != 'dense':
+                raise ValueError(f"Unknown similarity backend: {backend}")
+            if not sklearn_available:
+                raise RuntimeError("the dense backend requires scikit-learn")
+            return cosine_review_weights(n, self.reviews, use_sklearn=True, cancel=cancel)
+        if weighting == 'topk':
+            if backend not in ('auto', 'lsh', 'exact'):
+                raise ValueError(f"Unknown neighbour backend: {backend}")
+            return top_k_review_weights(n, self.reviews, k, approximate=backend == 'lsh', cancel=cancel)
+        if weighting == 'uniform':
+            return np.ones(len(self.reviews))
+        raise ValueError(f"Unknown weighting mode: {weighting}")
+
+    def score(self, weighting='cosine', backend='auto', k=DEFAULT_NEIGHBOURS, cancel=None):
+        # backend picks the cosine path: 'sparse' (CSR, memory grows with the
+        # number of reviews), 'numpy' (N x N, no extra dependencies), 'dense'
+        # (N x N via sklearn) or 'auto' (sparse with scipy, else numpy); for the
+        # 'topk' weighting it is 'exact' (sparse U U^T, the default) or 'lsh'
+        # (MinHash candidates, ~0.94 recall at k=10), keeping the k most similar
+        # reviewers; for 'category' it is the
+        # bias correction, 'none', 'center' or 'zscore' (the default). Setting
+        # the ``cancel`` event stops the run at the next stage or batch with
+        # AnalysisCancelled
+        if weighting == 'category':
+            # Imported here: category_cf builds on this module
+            from category_cf import DEFAULT_BIAS, score_by_category
+            return score_by_category(self, DEFAULT_BIAS if backend == 'auto' else backend, cancel=cancel)
+        with metrics.span("analysis.similarity"):
+            weight = self.review_weights(weighting, backend, k, cancel)
+        check_cancelled(cancel)
+        with metrics.span("analysis.scoring"):
+            if weighting == 'uniform':
+                # The simple path reports no similarity for individual reviews
+                return self.score_with_weights(weight, np.zeros(len(self.reviews)))
+            return self.score_with_weights(weight)
+
+    def score_with_weights(self, weight, reported_weight=None):
+        n = len(self.employees)
+        reviewee = self.reviews.reviewee_idx
+        review_avg = self.reviews.review_means()
+
+        objective_mean = self.objective.mean(axis=1)
+        review_count = np.bincount(reviewee, minlength=n)
+        weighted_sum = np.bincount(reviewee, weights=review_avg * weight, minlength=n)
+        total_weight = np.bincount(reviewee, weights=weight, minlength=n)
+        weighted_peer_avg = np.divide(weighted_sum, total_weight,
+                                      out=np.zeros(n), where=total_weight > 0)
+        final_score = (OBJECTIVE_WEIGHT * objective_mean + PEER_WEIGHT * weighted_peer_avg) / MAX_RATING
+
+        # Employees appear in the order their first review was recorded
+        _, first = np.unique(reviewee, return_index=True)
+        order = reviewee[np.sort(first)]
+
+        if reported_weight is None:
+            reported_weight = weight
+        metrics.count("reviews_processed", len(self.reviews))
+        metrics.count("employees_scored", len(order))
+        return ScoreResult(self, order, objective_mean, weighted_peer_avg, final_score,
+                           review_count, reported_weight, review_avg)
+
+
+def sweep_verdicts(result, weights, thresholds):
+    """Re-score every employee in ``result`` under other weights and thresholds at once.
+
+    ``weights`` is a sequence of (objective weight, peer weight) pairs and
+    ``thresholds`` a sequence of approval thresholds. Returns ``final`` of
+    shape (n_weights, n_employees) and ``approved`` of shape (n_weights,
+    n_thresholds, n_employees), with employees in ``result.order``.
+    """
+    weights = np.asarray(weights, dtype=np.float64).reshape(-1, 2)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    objective_mean = result.objective_mean[result.order]
+    peer = result.weighted_peer_avg[result.order]
+    final = (weights[:, :1] * objective_mean + weights[:, 1:] * peer) / MAX_RATING
+    return final, final[:, None, :] >= thresholds[None, :, None]
+
+
+def approval_counts(final, thresholds):
+    """Approved employees per (weights, threshold) for ``final`` from ``sweep_verdicts``,
+    without building the full verdict array."""
+    ranked = np.sort(final, axis=1)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    return np.stack([final.shape[1] - np.searchsorted(row, thresholds, side='left') for row in ranked])
+
+
+def compare_results(expected, actual, tol=EQUIVALENCE_TOL):
+    """List the differences between two ``{employee id: details}`` result dicts."""
+    problems = []
+    if list(expected) != list(actual):
+        problems.append("employee sets differ")
+        return problems
+    for emp, exp in expected.items():
+        act = actual[emp]
+        for key in ('status', 'verdict', 'objective_scores'):
+            if exp[key] != act[key]:
+                # A score within tol of the threshold may land on either side
+                if key == 'verdict' and abs(exp['final_score'] - APPROVAL_THRESHOLD) <= tol:
+                    continue
+                problems.append(f"{emp}: {key} {exp[key]!r} != {act[key]!r}")
+        for key in ('final_score', 'objective_mean', 'weighted_peer_avg'):
+            if abs(exp[key] - act[key]) > tol:
+                problems.append(f"{emp}: {key} {exp[key]!r} != {act[key]!r}")
+        exp_reviews, act_reviews = exp['reviewer_details'], act['reviewer_details']
+        if len(exp_reviews) != len(act_reviews):
+            problems.append(f"{emp}: review counts differ")
+            continue
+        for (r1, rt1, s1, a1), (r2, rt2, s2, a2) in zip(exp_reviews, act_reviews):
+            if r1 != r2 or rt1 != rt2 or abs(s1 - s2) > tol or abs(a1 - a2) > tol:
+                problems.append(f"{emp}: review by {r1} differs")
+    return problems
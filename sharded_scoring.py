@@ -0,0 +1,123 @@
+"""Multi-process cosine scoring over equal ranges of the reviews.
+
+A review's cosine weight is (row sum of the reviewer's similarity row -
+sim[reviewer, reviewee]) / (N - 1). The parent builds the row-normalized CSR
+user-item matrix ``unit`` and its column totals once, as
+``sparse_cosine_review_weights`` does, and places them in shared memory with
+the review arrays. The reviews are split into equal contiguous ranges, and
+each ``ProcessPoolExecutor`` worker attaches to the shared blocks and
+computes, for its range, ``unit[rv] @ column_total`` and the pairwise
+similarities; a reviewer or reviewee row owned by another range is simply
+read from shared memory, so the split does not depend on the shape of the
+review graph. The parent then runs the per-employee sums over the merged
+weight vector.
+
+Every row product and pair product is the same operation, on the same
+arrays, as in the single-process path, so the result is bit-for-bit
+identical to ``ScoringEngine.score('cosine', backend='sparse')``. Uniform
+weighting has no similarity work to spread and is scored in the parent.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from cancellation import check_cancelled
+from instrumentation import metrics
+from sparse_similarity import scipy_available, build_sparse_user_item_matrix, normalize_rows, pairwise_similarity
+
+# Review ranges per worker, so a slow range does not leave the others idle
+RANGES_PER_WORKER = 4
+
+
+class SharedArrays:
+    """NumPy arrays copied into named shared memory blocks, unlinked on exit."""
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.spec = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.spec[name] = (block.name, array.shape, array.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        return False
+
+
+def attach(spec):
+    """Map the blocks described by ``SharedArrays.spec``; returns (arrays, blocks)."""
+    arrays, blocks = {}, []
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return arrays, blocks
+
+
+def _score_range(spec, shape, start, stop):
+    """Worker: cosine weights of the reviews at positions start:stop."""
+    import scipy.sparse as sp
+    arrays, blocks = attach(spec)
+    try:
+        unit = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=shape, copy=False)
+        rv = arrays['reviewer'][start:stop]
+        re = arrays['reviewee'][start:stop]
+        row_sum = unit[rv] @ arrays['column_total']
+        return (row_sum - pairwise_similarity(unit, rv, re)) / max(shape[0] - 1, 1)
+    finally:
+        del arrays
+        for block in blocks:
+            block.close()
+
+
+def score_sharded(engine, weighting='cosine', workers=None, cancel=None):
+    """Score ``engine``'s cycle across a process pool; same result as ``engine.score``.
+
+    ``weighting`` is 'cosine' (matching the sparse backend) or 'uniform'.
+    """
+    if weighting not in ('cosine', 'uniform'):
+        raise ValueError(f"Sharded scoring supports cosine and uniform weighting, not {weighting}")
+    if not scipy_available:
+        raise RuntimeError("sharded scoring requires scipy")
+    if weighting == 'uniform':
+        return engine.score('uniform', cancel=cancel)
+    workers = workers or os.cpu_count() or 1
+    n = len(engine.employees)
+    reviews = engine.reviews
+    m = len(reviews)
+
+    with metrics.span("analysis.user_item_matrix"):
+        unit = normalize_rows(build_sparse_user_item_matrix(n, reviews))
+        column_total = np.asarray(unit.sum(axis=0)).ravel()
+    check_cancelled(cancel)
+    n_ranges = max(min(workers * RANGES_PER_WORKER, m), 1)
+    bounds = np.linspace(0, m, n_ranges + 1).astype(np.int64)
+
+    weight = np.empty(m)
+    arrays = {'indptr': unit.indptr, 'indices': unit.indices, 'data': unit.data,
+              'column_total': column_total, 'reviewer': reviews.reviewer_idx, 'reviewee': reviews.reviewee_idx}
+    with metrics.span("analysis.similarity"), SharedArrays(arrays) as shared:
+        with ProcessPoolExecutor(max_workers=min(workers, n_ranges)) as pool:
+            futures = [(bounds[s], bounds[s + 1], pool.submit(_score_range, shared.spec, unit.shape,
+                                                               bounds[s], bounds[s + 1]))
+                       for s in range(n_ranges) if bounds[s + 1] > bounds[s]]
+            for start, stop, future in futures:
+                if cancel is not None and cancel.is_set():
+                    # Ranges not yet started are dropped; running ones finish
+                    for _, _, pending in futures:
+                        pending.cancel()
+                    check_cancelled(cancel)
+                weight[start:stop] = future.result()
+
+    with metrics.span("analysis.scoring"):
+        return engine.score_with_weights(weight)
@@ -0,0 +1,64 @@
+"""Sparse user-item matrix and cosine similarity terms for large organisations.
+
+The scorer only ever needs two things from the N x N similarity matrix: the
+row sums and the entries at the reviewed (reviewer, reviewee) pairs. Both are
+computed here from a CSR matrix, so memory grows with the number of reviews
+and never with N squared.
+"""
+import importlib.util
+
+import numpy as np
+
+from cancellation import check_cancelled
+from instrumentation import metrics
+
+# scipy is optional and slow to import; it is imported on first use
+scipy_available = importlib.util.find_spec("scipy") is not None
+
+# Pairs scored per batch in pairwise_similarity, bounds the temporary row copies
+PAIR_BATCH = 65536
+
+
+def build_sparse_user_item_matrix(n, reviews):
+    """CSR reviewer x reviewee matrix of mean ratings (last review per pair wins)."""
+    import scipy.sparse as sp
+    keep = reviews.last_per_pair(n)
+    values = reviews.review_means()[keep]
+    return sp.csr_matrix((values, (reviews.reviewer_idx[keep], reviews.reviewee_idx[keep])),
+                         shape=(n, n))
+
+
+def normalize_rows(matrix):
+    """Scale each row to unit length; all-zero rows stay zero, as in sklearn."""
+    import scipy.sparse as sp
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return sp.csr_matrix(sp.diags(inverse) @ matrix)
+
+
+def similarity_row_sums(unit):
+    # sum_j sim[i, j] = u_i . sum_j u_j for the row-normalized matrix u
+    column_total = np.asarray(unit.sum(axis=0)).ravel()
+    return unit @ column_total
+
+
+def pairwise_similarity(unit, rows, cols, batch=PAIR_BATCH, cancel=None):
+    """Cosine similarity sim[rows[k], cols[k]] for each requested pair."""
+    out = np.empty(len(rows))
+    for start in range(0, len(rows), batch):
+        check_cancelled(cancel)
+        stop = start + batch
+        products = unit[rows[start:stop]].multiply(unit[cols[start:stop]])
+        out[start:stop] = np.asarray(products.sum(axis=1)).ravel()
+    return out
+
+
+def sparse_cosine_review_weights(n, reviews, cancel=None):
+    # Same weights as scoring_engine.cosine_review_weights without the dense matrix
+    with metrics.span("analysis.user_item_matrix"):
+        matrix = build_sparse_user_item_matrix(n, reviews)
+    check_cancelled(cancel)
+    unit = normalize_rows(matrix)
+    row_sum = similarity_row_sums(unit)
+    rv, re = reviews.reviewer_idx, reviews.reviewee_idx
+    return (row_sum[rv] - pairwise_similarity(unit, rv, re, cancel=cancel)) / max(n - 1, 1)